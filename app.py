@@ -6,107 +6,473 @@ This dashboard is for educational use.
 ----------------------------------------------------------------------------------------
 Main module, including all callbacks and cached functions.
 """
+import os
+import json
+import threading
 import logging as log
 from datetime import datetime
+from flask import Response, request
 from flask_caching import Cache
 
 import dash
+import dash_html_components as html
 from dash.exceptions import PreventUpdate
-from dash.dependencies import Output, Input, State
-import plotly.graph_objects as go
+from dash.dependencies import Output, Input, State, ClientsideFunction
 import pandas as pd
-from utils.db_interface import PostgresQueries as PQ
+from plotly.utils import PlotlyJSONEncoder
+from utils.db_interface import PostgresDB
+from utils.backends import get_backend
+from utils.resolver import CountryResolver, read_aliases
+from utils.cache import TieredCache
+from utils import snapshot, comparison, derived, downsample, epidemiology, instrumentation
 from layout.layout import layout
 
+os.makedirs("logs", exist_ok=True)
 log.getLogger().setLevel(log.INFO)
-log.basicConfig(filename='logs\\covid-dash.log', level=log.DEBUG)
+log.basicConfig(filename=os.path.join("logs", "covid-dash.log"), level=log.DEBUG)
 dset_order = ["confirmed_cases", "active_cases", "recovered_cases", "deaths"]
 bar_color = ["#7B4D80", "#3D8EDE", "#84CA72", "#D8555C"]
 color_select = dict(zip(dset_order, bar_color))
-
-sql = PQ()
+max_compare = 10
+downsample_points = int(os.environ.get("DOWNSAMPLE_POINTS", 250))
+snapshot_dir = os.environ.get("SNAPSHOT_DIR", "snapshot-directory")
+aliases = read_aliases()
+populations = derived.read_population()
 
 app = dash.Dash(__name__)
 server = app.server
 app.layout = layout
 app.title = "COVID19-Torran"
+
+
+@server.route("/metrics")
+def metrics():
+    """Exposes the callback, query and cache metrics in the Prometheus text format."""
+    return Response(instrumentation.render(), mimetype="text/plain; version=0.0.4")
+
+
+@server.after_request
+def record_response_size(response):
+    """Records the uncompressed size of every Dash callback response."""
+    if request.path.endswith("/_dash-update-component") and response.status_code == 200:
+        body = request.get_json(silent=True) or {}
+        instrumentation.response_bytes.observe(
+            response.calculate_content_length() or 0, output=body.get("output", "")
+        )
+    return response
+
+
+def data_version():
+    """Data version of this worker's backend; used to key both caches."""
+    return get_backend().current_version()
+
+
 cache = Cache()
 cache.init_app(
-    server, config={"CACHE_TYPE": "filesystem", "CACHE_DIR": "cache-directory"}
+    server,
+    config={
+        "CACHE_TYPE": "filesystem",
+        "CACHE_DIR": "cache-directory",
+        "CACHE_DEFAULT_TIMEOUT": 24 * 60 * 60,
+    },
+)
+frames = TieredCache(
+    cache,
+    name="frames",
+    max_bytes=int(os.environ.get("FRAME_CACHE_MB", 64)) * 2 ** 20,
+    version=data_version,
+)
+
+
+def warm_figures(version):
+    """Pre-renders the overview, the confirmed case indicators and the country
+    panels for the countries in the overview, in a background thread, once per data
+    version.
+
+    Arguments:
+        version {str} -- newly observed data version
+    """
+
+    def warm():
+        log.info("Warming figure cache for data version {}".format(version))
+        overview_traces(False)
+        overview_traces(True)
+        get_indicators("confirmed_cases")
+        overview = get_overview_data(False)
+        if len(overview):
+            for country in overview["country"].head(warm_countries):
+                country_traces(PostgresDB.clean_name(country), None, False)
+        log.info("Figure cache warm for data version {}".format(version))
+
+    threading.Thread(target=warm, daemon=True).start()
+
+
+warm_countries = int(os.environ.get("WARM_COUNTRIES", 20))
+figures = TieredCache(
+    cache,
+    name="figures",
+    max_bytes=int(os.environ.get("FIGURE_CACHE_MB", 16)) * 2 ** 20,
+    version=data_version,
+    on_change=warm_figures,
 )
 
 
-@cache.memoize()
-def get_overview_data():
+@frames.memoize()
+def get_overview_data(per_capita):
     """Cached function to fetch summarised data of the top 20 countries.
     Summarised data: confirmed_cases, recovered_cases, deaths, active_cases
 
+    Arguments:
+        per_capita {bool} -- rank and report values per 100k people
+
     Returns:
-        json -- dataframe of top 20 countries overview data, stored in json for cache.
+        dataframe -- top 20 countries overview data; shared, do not modify in place.
     """
     log.info("Getting overview data")
-    # print("Getting overview data")
-    overview = sql.overview_query()
-    return overview.to_json(orient="split")
+    return get_backend().overview_query(per_capita)
 
 
-@cache.memoize()
+@frames.memoize()
 def get_global_data():
     """Cached function to fetch summarised global data of all countries.
 
     Returns:
-        json -- dataframe of summarised global data
+        dataframe -- summarised global data; shared, do not modify in place.
     """
     log.info("Getting global data")
-    # print("Getting global data")
-    global_data = sql.global_total()
-    return global_data.to_json(orient="split")
+    return get_backend().global_total()
+
+
+_resolver = (None, None)
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Builds the country name resolver once per process and data version, from the
+    countries with data and the alias table.
+
+    Returns:
+        CountryResolver -- resolver for the current data version
+    """
+    global _resolver
+    version = data_version()
+    with _resolver_lock:
+        if _resolver[0] != version or not _resolver[1].countries:
+            _resolver = (version, CountryResolver(get_country_list(), aliases))
+        return _resolver[1]
+
+
+_snapshot = (None, None)
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    """Memory-maps the snapshot of the current data version, once per process and
+    version. If the ingest ran elsewhere the first worker to need it builds it from
+    the database; the others then map the same files.
+
+    Returns:
+        Snapshot -- snapshot of the current data version, or None if unavailable
+    """
+    global _snapshot
+    version = data_version()
+    if not snapshot_dir or not version:
+        return None
+    with _snapshot_lock:
+        if _snapshot[0] != version:
+            opened = snapshot.Snapshot.open(snapshot_dir, version)
+            if opened is None:
+                opened = build_snapshot(version)
+            _snapshot = (version, opened)
+        return _snapshot[1]
+
+
+def build_snapshot(version):
+    """Writes the snapshot of a data version from the backend's country series.
+
+    Arguments:
+        version {str} -- data version to write
+
+    Returns:
+        Snapshot -- the new snapshot, or None if it could not be written
+    """
+    log.info("Building snapshot for data version {}".format(version))
+    data = get_backend().country_query_many(get_backend().country_list())
+    if not len(data):
+        return None
+    try:
+        snapshot.write(snapshot_dir, version, data.reset_index())
+    except OSError:
+        log.error("Snapshot for data version {} could not be written".format(version))
+        return None
+    return snapshot.Snapshot.open(snapshot_dir, version)
 
 
-@cache.memoize()
 def get_country_data(country):
-    country_data = sql.country_query(country)
-    return country_data.to_json(orient="split")
+    """Fetches the time series of a single country, sliced from the snapshot when
+    there is one.
+
+    Arguments:
+        country {string} -- normalised country name
+
+    Returns:
+        dataframe -- country time series; shared, do not modify in place.
+    """
+    current = get_snapshot()
+    if current is not None:
+        return current.country(country)
+    return query_country_data(country)
+
+
+@frames.memoize()
+def query_country_data(country):
+    """Cached function to fetch the time series of a single country.
+
+    Arguments:
+        country {string} -- normalised country name
+
+    Returns:
+        dataframe -- country time series; shared, do not modify in place.
+    """
+    return get_backend().country_query(country)
+
+
+@frames.memoize()
+def get_country_list():
+    """Cached function to fetch the names of every country with data.
+
+    Returns:
+        list -- normalised country names
+    """
+    return get_backend().country_list()
+
+
+@frames.memoize(cache_empty=True)
+def get_province_list(country):
+    """Cached function to fetch the provinces of a country.
+
+    Arguments:
+        country {string} -- normalised country name
+
+    Returns:
+        list -- province names; empty for national-only countries, None if
+                unavailable. Empty lists are cached too.
+    """
+    return get_backend().province_list(country)
+
+
+@frames.memoize()
+def get_province_data(country, province):
+    """Cached function to fetch the time series of a single province.
+
+    Arguments:
+        country {string} -- normalised country name
+        province {string} -- province name
+
+    Returns:
+        dataframe -- province time series; shared, do not modify in place.
+    """
+    return get_backend().province_query(country, province)
+
+
+def get_region_data(country, province=None, per_capita=False):
+    """Fetches the time series of a country, or of one of its provinces.
+
+    Arguments:
+        country {string} -- normalised country name
+
+    Keyword Arguments:
+        province {string} -- province name; None for the whole country
+        per_capita {bool} -- return the per 100k series under the plain metric
+                             names; ignored for provinces, which have no population
+
+    Returns:
+        dataframe -- time series; shared, do not modify in place.
+    """
+    if province:
+        return get_province_data(country, province)
+    data = get_country_data(country)
+    if not per_capita:
+        return data
+    columns = {
+        column: column[: -len("_per_100k")]
+        for column in data.columns
+        if column.endswith("_per_100k")
+    }
+    return data[list(columns)].rename(columns=columns)
+
+
+def get_comparison_data(countries):
+    """Fetches the time series of several countries at once, sliced from the
+    snapshot when there is one.
+
+    Arguments:
+        countries {tuple} -- sorted, normalised country names
+
+    Returns:
+        dataframe -- country series indexed by (country, date); shared, do not
+                     modify in place.
+    """
+    current = get_snapshot()
+    if current is not None:
+        return current.country_many(countries)
+    return query_comparison_data(countries)
+
+
+@frames.memoize()
+def query_comparison_data(countries):
+    """Cached function to fetch the time series of several countries at once.
+
+    Arguments:
+        countries {tuple} -- sorted, normalised country names
+
+    Returns:
+        dataframe -- country series indexed by (country, date); shared, do not
+                     modify in place.
+    """
+    return get_backend().country_query_many(list(countries))
+
+
+def get_matrices(metric):
+    """Fetches a cumulative series and its daily series for every country, sliced
+    from the snapshot when there is one.
+
+    Arguments:
+        metric {str} -- cumulative series, e.g. confirmed_cases
+
+    Returns:
+        tuple -- cumulative and daily dates x countries dataframes
+    """
+    current = get_snapshot()
+    if current is not None:
+        return current.matrix(metric), current.matrix("new_{}".format(metric))
+    data = get_comparison_data(tuple(get_country_list()))
+    if not len(data):
+        return pd.DataFrame(), pd.DataFrame()
+    return comparison.to_matrices(data, metric)
+
+
+@frames.memoize()
+def get_indicators(metric):
+    """Cached function computing the epidemiological indicators of every country at
+    once, per data version.
+
+    Arguments:
+        metric {str} -- cumulative series, e.g. confirmed_cases
+
+    Returns:
+        dataframe -- dates x (indicator, country) values; shared, do not modify in
+                     place.
+    """
+    (cumulative, daily) = get_matrices(metric)
+    if not len(cumulative):
+        return None
+    return epidemiology.indicators(cumulative, daily)
+
+
+@figures.memoize()
+def overview_traces(per_capita):
+    """Cached function rendering the overview bar chart traces of all 20 countries.
+    The bar-limit slider truncates them in the browser.
+
+    Arguments:
+        per_capita {bool} -- render values per 100k people
+
+    Returns:
+        string -- JSON list of bar traces
+    """
+    data = get_overview_data(per_capita)
+    if not len(data):
+        return None
+    dset = [value for value in dset_order if value != "confirmed_cases"]
+    x = data["country"].str.title()
+    traces = [
+        dict(
+            dict(marker=dict(color=color_select[category], line={"width": "0"})),
+            type="bar",
+            x=x,
+            y=data[category],
+            name=category,
+            hovertext="Click for more information.",
+            hoverinfo="y+name",
+        )
+        for category in dset
+    ]
+    return json.dumps(traces, cls=PlotlyJSONEncoder)
+
+
+@figures.memoize()
+def country_traces(country, province, per_capita):
+    """Cached function rendering the traces of every country panel. Arguments are
+    positional only, as they form the cache key.
+
+    Arguments:
+        country {string} -- normalised country name
+        province {string} -- province to render instead; None for the whole country
+        per_capita {bool} -- render values per 100k people; ignored for provinces
+
+    Returns:
+        string -- JSON object of trace lists keyed by graph id
+    """
+    data = get_region_data(country, province, per_capita)
+    if not len(data):
+        return None
+    stats = update_country_stats(data, {}, per_capita and not province)
+    traces = {
+        "country-stats": stats["data"],
+        "country-total": update_line(data, {})["data"],
+        "country-rates": update_rates_bar(data, {})["data"],
+        "country-pie": update_pie(data, {})["data"],
+    }
+    return json.dumps(traces, cls=PlotlyJSONEncoder)
 
 
 @app.callback(
-    Output("overview-graph", "figure"),
-    [Input("bar-limit", "value")],
-    [State("overview-graph", "figure")],
+    Output("overview-store", "data"),
+    [Input("title", "children")],
+    [State("overview-store", "data")],
 )
-def update_bar(limit, fig):
-    """Callback to update the bar chart when the slider input is changed.
+@instrumentation.callback_seconds.time("callback")
+def load_overview(_, stored):
+    """Callback called on page load, ships the overview traces to the browser once
+    per data version, in absolute and per 100k form. The bar-limit slider and the
+    overview-scale toggle are handled by the clientside callback overview.updateBar
+    in assets/overview.js, without a server round-trip.
 
     Arguments:
-        limit {int} -- slider valued between 2 and 20 inclusive
-        fig {dict} -- current bar chart; used to determine layout
+        _ {string} -- necessary to fire callback
+        stored {dict} -- overview traces already in the browser session
 
     Raises:
-        PreventUpdate: Prevents the bar chart update if limit is out of bounds
+        PreventUpdate: Prevents the update if the session holds the current version
 
     Returns:
-        dict -- figure dict for the updated bar chart
+        dict -- data version, absolute and per 100k overview traces
     """
-    fig["data"] = []
-    if limit is None or limit < 2 or limit > 20:
+    version = data_version()
+    if stored is not None and stored.get("version") == version:
         raise PreventUpdate
-    data = pd.read_json(get_overview_data(), orient="split")
-    data = data.truncate(after=limit - 1)
-    dset = [value for value in dset_order if value != "confirmed_cases"]
-    x = data["country"].str.title()
-    for category in dset:
-        fig["data"].append(
-            dict(
-                dict(marker=dict(color=color_select[category], line={"width": "0"})),
-                type="bar",
-                x=x,
-                y=data[category],
-                name=category,
-                hovertext="Click for more information.",
-                hoverinfo="y+name",
-            )
-        )
-    return fig
+    traces = overview_traces(False)
+    if traces is None:
+        raise PreventUpdate
+    per_capita_traces = overview_traces(True)
+    return {
+        "version": version,
+        "traces": json.loads(traces),
+        "per_capita_traces": json.loads(per_capita_traces) if per_capita_traces else None,
+    }
+
+
+app.clientside_callback(
+    ClientsideFunction(namespace="overview", function_name="updateBar"),
+    Output("overview-graph", "figure"),
+    [
+        Input("bar-limit", "value"),
+        Input("overview-scale", "value"),
+        Input("overview-store", "data"),
+    ],
+    [State("overview-graph", "figure")],
+)
 
 
 @app.callback(
@@ -114,6 +480,7 @@ def update_bar(limit, fig):
     [Input("title", "children")],
     [State("global-stats", "figure")],
 )
+@instrumentation.callback_seconds.time("callback")
 def page_load(_, fig):
     """Callback called on page load, updates the global statistics and footer
 
@@ -121,13 +488,18 @@ def page_load(_, fig):
         _ {string} -- necessary to fire callback
         fig {dict} -- figure dict of current global stats; used for layout
 
+    Raises:
+        PreventUpdate: Prevents the update until the ingest metadata is readable
+
     Returns:
         dict -- figure dict of global statistics indicators
         string -- footer information/disclaimer
     """
+    if not get_backend().ready():
+        raise PreventUpdate
     fig["data"] = []
     n = 0
-    global_data = pd.read_json(get_global_data(), orient="split")
+    global_data = get_global_data()
     for dset in dset_order:
         fig["data"].append(
             dict(
@@ -146,7 +518,7 @@ def page_load(_, fig):
         )
         n += 0.25
     disclaimer = "Data last updated: {:%d/%m/%y}".format(
-        datetime.strptime(sql.last_columns[0], "_%m_%d_%y")
+        datetime.strptime(get_backend().last_columns[0], "_%m_%d_%y")
     )
     return fig, disclaimer
 
@@ -164,61 +536,204 @@ def page_load(_, fig):
     [
         Input("select-country", "n_clicks"),
         Input("choose-country", "n_submit"),
-        Input("overview-graph", "clickData")],
+        Input("overview-graph", "clickData"),
+        Input("country-total", "relayoutData"),
+        Input("country-rates", "relayoutData"),
+        Input("choose-province", "value"),
+        Input("country-scale", "value"),
+    ],
     [
         State("choose-country", "value"),
+        State("country-store", "data"),
         State("country-stats", "figure"),
         State("country-total", "figure"),
         State("country-rates", "figure"),
         State("country-pie", "figure")
     ],
 )
-def update_country(_, _2, clickData, country, stats_fig, total_fig, rates_fig, pie_fig):
+@instrumentation.callback_seconds.time("callback")
+def update_country(
+    _,
+    _2,
+    clickData,
+    total_relayout,
+    rates_relayout,
+    province,
+    scale,
+    country,
+    stored_country,
+    stats_fig,
+    total_fig,
+    rates_fig,
+    pie_fig,
+):
     """Callback to update the country displayed in the country view.
 
     Arguments:
         _ {int} -- fires callback on submit button press
         clickData {dict} -- bar chart click data for selected country
+        total_relayout {dict} -- line chart relayout data; zooming re-renders it
+        rates_relayout {dict} -- daily bar chart relayout data; zooming re-renders it
+        province {string} -- province drilled down to; None for the whole country
+        scale {string} -- "absolute" or "per_capita"
         country {string} -- input text box value
+        stored_country {string} -- normalised name of the country on display
         pie_fig {dict} -- figure dict of current pie chart
         stats_fig {dict} -- figure dict of current indicator chart
         total_fig {dict} -- figure dict of current line chart
 
+    Raises:
+        PreventUpdate: Prevents the update if the country list is unavailable
+
     Returns:
-        tuple -- necessary updates for new country, calls functions to update figures
+        tuple -- necessary updates for new country, calls functions to update figures;
+                 an unknown name only updates the heading, with suggestions
     """
     ctx = dash.callback_context
     trigger = ctx.triggered[0]["prop_id"].split(".")[0]
-    if (trigger == "select-country" or trigger == "choose-country") and country != "":
-        if country.title() == "Uk":
-            selected_country = "United Kingdom"
-        else:
-            selected_country = country.title()
+    # Countries missing from the population table have no per-capita series.
+    per_capita = scale == "per_capita" and stored_country in populations
+    if trigger == "country-total":
+        total_fig = zoom_country(
+            stored_country,
+            province,
+            per_capita,
+            total_relayout,
+            total_fig,
+            "country-total",
+            update_line,
+        )
+        return (dash.no_update,) * 4 + (total_fig, dash.no_update, dash.no_update)
+    if trigger == "country-rates":
+        rates_fig = zoom_country(
+            stored_country,
+            province,
+            per_capita,
+            rates_relayout,
+            rates_fig,
+            "country-rates",
+            update_rates_bar,
+        )
+        return (dash.no_update,) * 5 + (rates_fig, dash.no_update)
+    resolver = get_resolver()
+    if trigger in ("choose-province", "country-scale") and stored_country:
+        selected_country = stored_country
+    elif (trigger == "select-country" or trigger == "choose-country") and country:
+        selected_country = resolver.resolve(country)
+        if selected_country is None:
+            suggestions = ", ".join(display_name(name) for name in resolver.suggest(country))
+            heading = "No data for {}".format(country)
+            if suggestions:
+                heading += ". Did you mean {}?".format(suggestions)
+            return (heading,) + (dash.no_update,) * 6
     elif clickData is not None:
-        selected_country = clickData["points"][0]["label"]
+        selected_country = resolver.resolve(clickData["points"][0]["label"])
     else:
-        selected_country = "US"
-
-    if selected_country == 'Korea, South':
-        selected_country = "south korea"
-    country_display = selected_country.title()
-    if country_display == "Us":
-        country_display = "US"
+        selected_country = resolver.resolve("US")
+    if selected_country is None:
+        raise PreventUpdate
+    if trigger not in ("choose-province", "country-scale"):
+        province = None
+    country_display = display_name(selected_country)
+    heading = "{}, {}".format(province, country_display) if province else country_display
+    per_capita = scale == "per_capita" and not province
+    if per_capita and selected_country not in populations:
+        heading += " (per-capita figures unavailable, showing totals)"
+        per_capita = False
+    elif per_capita:
+        heading += " (per 100k)"
 
-    selected_country = selected_country.strip().replace(' ', '_').replace('-', '_').replace("'", '_').replace('*', '').lower()
-    data = pd.read_json(get_country_data(selected_country), orient="split")
-    # print(data)
+    traces = country_traces(selected_country, province, per_capita)
+    if traces is None:
+        raise PreventUpdate
+    traces = json.loads(traces)
+    stats_fig["data"] = traces["country-stats"]
+    total_fig["data"] = traces["country-total"]
+    rates_fig["data"] = traces["country-rates"]
+    pie_fig["data"] = traces["country-pie"]
+    for fig in [total_fig, rates_fig]:
+        fig["layout"]["xaxis"].pop("range", None)
+        fig["layout"]["xaxis"]["autorange"] = True
     return (
-        country_display,
+        heading,
         country_display,
         selected_country,
-        update_country_stats(data, stats_fig),
-        update_line(data, total_fig),
-        update_rates_bar(data, rates_fig),
-        update_pie(data, pie_fig),
+        stats_fig,
+        total_fig,
+        rates_fig,
+        pie_fig,
     )
 
 
+def zoom_country(country, province, per_capita, relayout, fig, graph_id, update):
+    """Re-renders a country time series chart for its visible x range.
+
+    The chart's data is cut to the visible range, padded by half its width on each
+    side for panning, and only then downsampled, so zooming in restores full
+    resolution. Resetting the range reuses the cached full-range traces.
+
+    Arguments:
+        country {string} -- normalised name of the country on display
+        province {string} -- province on display; None for the whole country
+        per_capita {bool} -- chart values per 100k people; ignored for provinces
+        relayout {dict} -- relayout data of the chart
+        fig {dict} -- figure dict of the chart
+        graph_id {string} -- id of the chart
+        update {function} -- update_line or update_rates_bar
+
+    Raises:
+        PreventUpdate: Prevents the update if the x range did not change
+
+    Returns:
+        dict -- figure dict of the re-rendered chart
+    """
+    relayout = relayout or {}
+    if "xaxis.range[0]" in relayout:
+        window = (relayout["xaxis.range[0]"], relayout["xaxis.range[1]"])
+    elif "xaxis.range" in relayout:
+        window = tuple(relayout["xaxis.range"])
+    elif relayout.get("xaxis.autorange"):
+        window = None
+    else:
+        raise PreventUpdate
+    if not country:
+        raise PreventUpdate
+    fig["layout"]["xaxis"].pop("range", None)
+    fig["layout"]["xaxis"]["autorange"] = True
+    if window is None:
+        traces = country_traces(country, province, per_capita)
+        if traces is None:
+            raise PreventUpdate
+        fig["data"] = json.loads(traces)[graph_id]
+        return fig
+    (start, end) = (pd.Timestamp(window[0]), pd.Timestamp(window[1]))
+    padding = (end - start) / 2
+    data = get_region_data(country, province, per_capita)
+    fig = update(data.loc[start - padding : end + padding], fig)
+    fig["layout"]["xaxis"]["range"] = list(window)
+    fig["layout"]["xaxis"]["autorange"] = False
+    return fig
+
+
+def thin(series, method):
+    """Downsamples a series to downsample_points, if enabled and needed.
+
+    Arguments:
+        series {Series} -- date indexed series without NaN
+        method {string} -- "lttb" for lines, "minmax" for bars
+
+    Returns:
+        Series -- the kept points of series
+    """
+    if not downsample_points or len(series) <= downsample_points:
+        return series
+    if method == "lttb":
+        kept = downsample.lttb(series.index.asi8, series.to_numpy(), downsample_points)
+    else:
+        kept = downsample.minmax(series.to_numpy(), downsample_points)
+    return series.iloc[kept]
+
+
 def update_pie(data, fig):
     """function to update the cases distribution pie chart
 
@@ -235,7 +750,7 @@ def update_pie(data, fig):
         dict(
             type="pie",
             labels=labels,
-            values=data.iloc[-1],
+            values=data.iloc[-1].fillna(0),
             sort=False,
             marker=dict(colors=[color_select[i] for i in labels]),
             outsidetextfont=dict(color="rgb(228, 241, 250)"),
@@ -253,29 +768,29 @@ def update_line(data, fig):
     """Updates cummulative line graph.
 
     Arguments:
-        country {string} -- required country
-        fig {dict} -- figure dict of current line chart; used for layout
+        data {dataframe} -- dataframe of country time series
+        fig {dict} -- figure dict of current line chart
 
     Returns:
         dict -- figure dict of updated line chart
     """
-    layout = fig["layout"]
-    fig = go.Figure()
+    fig["data"] = []
     for dset in dset_order:
-        y = data[dset]
-        idx = y.ne(0).idxmax()
-        y = y[idx:]
+        y = thin(data[dset].dropna(), "lttb")
         x = y.index
-        fig.add_trace(
-            go.Scatter(
-                x=x, y=y, name=dset, line=dict(color=color_select[dset], width=4)
+        fig["data"].append(
+            dict(
+                type="scatter",
+                x=x,
+                y=y,
+                name=dset,
+                line=dict(color=color_select[dset], width=4),
             )
         )
-    fig.update_layout(layout)
     return fig
 
 
-def update_country_stats(data, fig):
+def update_country_stats(data, fig, per_capita=False):
     """Updates country specific overview statistics
 
     Arguments:
@@ -283,21 +798,25 @@ def update_country_stats(data, fig):
         data {dataframe} -- dataframe of country overview data
         fig {dict} -- figure dict of current indicator; used for layout
 
+    Keyword Arguments:
+        per_capita {bool} -- values are per 100k people, shown to one decimal place
+
     Returns:
         dict -- figure dict of updated indicator chart
     """
     fig["data"] = []
     n = 0
+    scale = (lambda value: round(float(value), 1)) if per_capita else int
     for dset in dset_order:
         fig["data"].append(
             dict(
                 type="indicator",
                 mode="number+delta",
                 title=dict(text=dset, font={"color": "#83B7EA"}),
-                value=int(data.loc[data.index[-1], dset]),
+                value=scale(data[dset].fillna(0).iloc[-1]),
                 number=dict(font={"color": "#83B7EA"}),
                 delta={
-                    "reference": int(data.loc[data.index[-2], dset]),
+                    "reference": scale(data[dset].fillna(0).iloc[-2]),
                     "increasing": {"color": "rgb(228, 241, 250)"},
                     "decreasing": {"color": "rgb(228, 241, 250)"},
                 },
@@ -312,10 +831,7 @@ def update_rates_bar(data, fig):
     fig["data"] = []
     dsets = [dset for dset in dset_order if dset != 'active_cases']
     for dset in dsets:
-        y = data[dset].diff()
-        idx = y.ne(0).idxmax()
-        y = y[idx:]
-        y.dropna(inplace=True)
+        y = thin(data["new_{}".format(dset)].dropna(), "minmax")
         x = y.index
         fig["data"].append(
             dict(
@@ -331,5 +847,189 @@ def update_rates_bar(data, fig):
     return fig
 
 
+@app.callback(
+    [Output("choose-province", "options"), Output("choose-province", "value")],
+    [Input("country-store", "data")],
+    [State("choose-province", "value")],
+)
+@instrumentation.callback_seconds.time("callback")
+def load_province_options(country, province):
+    """Callback to list the provinces of the country on display, clearing any
+    province drilled down to in the previous country.
+
+    Arguments:
+        country {string} -- normalised name of the country on display
+        province {string} -- province currently selected
+
+    Raises:
+        PreventUpdate: Prevents the update if no country is on display
+
+    Returns:
+        list -- dropdown options of the country's provinces
+        string -- cleared province, if one was selected
+    """
+    if not country:
+        raise PreventUpdate
+    options = [{"label": name, "value": name} for name in get_province_list(country) or []]
+    return options, (None if province is not None else dash.no_update)
+
+
+@app.callback(
+    Output("country-indicators", "figure"),
+    [
+        Input("country-store", "data"),
+        Input("choose-province", "value"),
+        Input("indicator-choice", "value"),
+        Input("indicator-metric", "value"),
+    ],
+    [State("country-indicators", "figure")],
+)
+@instrumentation.callback_seconds.time("callback")
+def update_indicators(country, province, indicator, metric, fig):
+    """Callback to update the indicator chart of the country view.
+
+    Country indicators are sliced from those precomputed for every country; a
+    province's are computed from its own series.
+
+    Arguments:
+        country {string} -- normalised name of the country on display
+        province {string} -- province on display; None for the whole country
+        indicator {string} -- one of epidemiology.INDICATORS
+        metric {string} -- cumulative series, e.g. confirmed_cases
+        fig {dict} -- figure dict of the indicator chart; used for layout
+
+    Raises:
+        PreventUpdate: Prevents the update if the region has no data
+
+    Returns:
+        dict -- figure dict of the indicator chart
+    """
+    if not country:
+        raise PreventUpdate
+    data = get_region_data(country, province)
+    if not len(data):
+        raise PreventUpdate
+    daily = data["new_{}".format(metric)]
+    if province:
+        values = epidemiology.indicators(data[[metric]], daily.to_frame(metric))
+        values = values[(indicator, metric)]
+    else:
+        values = get_indicators(metric)
+        if values is None or (indicator, country) not in values:
+            raise PreventUpdate
+        values = values[(indicator, country)]
+    fig["data"] = []
+    if indicator == "average":
+        y = thin(daily.dropna(), "minmax")
+        fig["data"].append(
+            dict(
+                type="bar",
+                x=y.index,
+                y=y,
+                name="new_{}".format(metric),
+                opacity=0.4,
+                marker=dict(color=color_select[metric], line={"width": "0"}),
+            )
+        )
+    y = thin(values.dropna(), "lttb")
+    fig["data"].append(
+        dict(
+            type="scatter",
+            x=y.index,
+            y=y,
+            name=indicator,
+            line=dict(color=color_select[metric], width=4),
+        )
+    )
+    fig["layout"]["yaxis"]["type"] = "log" if indicator == "doubling_time" else "linear"
+    return fig
+
+
+def display_name(country):
+    """Converts a normalised country name into its display form.
+
+    Arguments:
+        country {string} -- normalised country name, e.g. united_kingdom
+
+    Returns:
+        string -- display name, e.g. United Kingdom
+    """
+    name = country.replace("_", " ").title()
+    return "US" if name == "Us" else name
+
+
+@app.callback(
+    [Output("compare-countries", "options"), Output("country-options", "children")],
+    [Input("title", "children")],
+)
+@instrumentation.callback_seconds.time("callback")
+def load_country_options(_):
+    """Callback called on page load, fills the comparison country picker and the
+    suggestions of the country search box, which the browser filters as the user
+    types.
+
+    Arguments:
+        _ {string} -- necessary to fire callback
+
+    Returns:
+        list -- dropdown options of every country
+        list -- datalist options of every country
+    """
+    countries = get_country_list()
+    return (
+        [{"label": display_name(country), "value": country} for country in countries],
+        [html.Option(value=display_name(country)) for country in countries],
+    )
+
+
+@app.callback(
+    [Output("compare-total", "figure"), Output("compare-daily", "figure")],
+    [
+        Input("compare-countries", "value"),
+        Input("compare-metric", "value"),
+        Input("compare-align", "value"),
+        Input("compare-threshold", "value"),
+        Input("compare-normalise", "value"),
+    ],
+    [State("compare-total", "figure"), State("compare-daily", "figure")],
+)
+@instrumentation.callback_seconds.time("callback")
+def update_comparison(countries, metric, align, threshold, normalise, total_fig, daily_fig):
+    """Callback to update the comparison charts for the selected countries.
+
+    Arguments:
+        countries {list} -- normalised names of the countries to compare
+        metric {string} -- series to compare
+        align {string} -- "date", or "days" to align on days since the Nth case
+        threshold {int} -- N, the case count marking day zero
+        normalise {string} -- "absolute", or "peak" to scale to % of each peak
+        total_fig {dict} -- figure dict of the cumulative chart; used for layout
+        daily_fig {dict} -- figure dict of the daily chart; used for layout
+
+    Raises:
+        PreventUpdate: Prevents the update if no country is selected or has data
+
+    Returns:
+        tuple -- figure dicts of the cumulative and daily charts
+    """
+    if not countries:
+        raise PreventUpdate
+    data = get_comparison_data(tuple(sorted(countries[:max_compare])))
+    if not len(data):
+        raise PreventUpdate
+    threshold = max(threshold or 1, 1) if align == "days" else None
+    (cumulative, daily) = comparison.compare(data, metric, threshold, normalise == "peak")
+    xaxis = dict(title=dict(text="Date"), type="date")
+    if threshold is not None:
+        xaxis = dict(title=dict(text="Days since case {}".format(threshold)), type="linear")
+    for fig, matrix in [(total_fig, cumulative), (daily_fig, daily)]:
+        fig["data"] = [
+            dict(type="scatter", x=matrix.index, y=matrix[country], name=display_name(country))
+            for country in matrix.columns
+        ]
+        fig["layout"]["xaxis"].update(xaxis)
+    return total_fig, daily_fig
+
+
 if __name__ == "__main__":
     app.run_server(debug=True)
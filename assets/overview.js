@@ -0,0 +1,26 @@
+/*
+ * Clientside callbacks for the overview bar chart. The overview traces of all 20
+ * countries are shipped once into the overview-store, in absolute and per 100k
+ * form; moving the bar-limit slider or the overview-scale toggle only picks and
+ * truncates them here, without a request to the server.
+ */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    overview: {
+        updateBar: function(limit, scale, store, fig) {
+            if (!store || !store.traces || limit === null || limit < 2 || limit > 20) {
+                return fig;
+            }
+            var source = store.traces;
+            if (scale === "per_capita" && store.per_capita_traces) {
+                source = store.per_capita_traces;
+            }
+            var traces = source.map(function(trace) {
+                return Object.assign({}, trace, {
+                    x: trace.x.slice(0, limit),
+                    y: trace.y.slice(0, limit)
+                });
+            });
+            return Object.assign({}, fig, {data: traces});
+        }
+    }
+});
@@ -0,0 +1,53 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Times one country_query_many() call against a country_query() call per country,
+for the countries currently in the overview.
+
+    python -m benchmarks.country_query_benchmark [--countries N] [--repeat N]
+"""
+import argparse
+
+from benchmarks.run import measure
+from utils.db_interface import PostgresDB, PostgresQueries
+
+
+def run(count, repeat):
+    """Prints the timings of both query paths.
+
+    Arguments:
+        count {int} -- number of countries to fetch
+        repeat {int} -- timed runs per path
+
+    Returns:
+        tuple -- best seconds of the individual and the batched queries
+    """
+    sql = PostgresQueries()
+    countries = [PostgresDB.clean_name(name) for name in sql.overview_query()["country"]]
+    countries = countries[:count]
+
+    def individual():
+        for country in countries:
+            sql.country_query(country)
+
+    sql.country_query_many(countries)
+    individual()
+    single = measure(individual, repeat)["min"]
+    batched = measure(lambda: sql.country_query_many(countries), repeat)["min"]
+    print(
+        "{} countries: {} x country_query {:.3f}s, country_query_many {:.3f}s ({:.1f}x)".format(
+            len(countries), len(countries), single, batched, single / batched
+        )
+    )
+    return single, batched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare batched and per-country queries.")
+    parser.add_argument("--countries", type=int, default=20, help="countries to fetch")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per path")
+    args = parser.parse_args()
+    run(args.countries, args.repeat)
@@ -0,0 +1,67 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Times the county ingest and queries at the full county scale. Without --url the
+datasets are generated by benchmarks.synthetic (3,300 counties by default). Loads
+into DATABASE_URL, so use a disposable local database.
+
+    python -m benchmarks.county_benchmark [--url URL_OR_PATH_TEMPLATE] [--counties N]
+                                          [--days N] [--repeat N]
+"""
+import time
+import argparse
+import resource
+import tempfile
+
+import numpy as np
+from benchmarks import synthetic
+from benchmarks.run import measure
+from utils.counties import CountyDB
+
+
+def run(url, repeat, sample=20):
+    """Loads the county datasets and prints the ingest and query timings.
+
+    Arguments:
+        url {str} -- dataset location, formatted with the dataset name
+        repeat {int} -- timed runs per query
+
+    Keyword Arguments:
+        sample {int} -- counties fetched by the per-county query timing
+
+    Returns:
+        dict -- seconds per stage, and the peak resident memory in MB
+    """
+    db = CountyDB()
+    start = time.perf_counter()
+    rows = db.create_tables(url=url)
+    results = {"ingest": time.perf_counter() - start}
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    top = db.county_top(sample)
+    uids = list(np.random.RandomState(0).choice(top["uid"], min(sample, len(top)), False))
+    results["county_top"] = measure(lambda: db.county_top(20), repeat)["min"]
+    results["county_query"] = measure(
+        lambda: [db.county_query(uid) for uid in uids], repeat
+    )["min"]
+    results["county_query"] /= max(len(uids), 1)
+    print("Rows written: {}".format(rows))
+    for name, value in results.items():
+        print("{:<16} {:>10.3f}".format(name, value))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the county ingest and queries.")
+    parser.add_argument("--url", help="URL or local path template of the county datasets")
+    parser.add_argument("--counties", type=int, default=3300, help="synthetic counties")
+    parser.add_argument("--days", type=int, default=300, help="synthetic days")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per query")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or synthetic.write_county_datasets(
+            directory, counties=args.counties, days=args.days
+        )
+        run(url, args.repeat)
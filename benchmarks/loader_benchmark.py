@@ -0,0 +1,66 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Times the to_sql and COPY loaders against each other on the derived series tables.
+Scratch tables are prefixed with "bench_" and dropped afterwards.
+
+    python -m benchmarks.loader_benchmark [--url URL_OR_PATH_TEMPLATE] [--repeat N]
+"""
+import argparse
+
+import pandas as pd
+from utils import derived
+from utils.db_interface import PostgresDB, quote
+
+URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{}_global.csv"
+
+
+def run(url, repeat):
+    """Writes every formatted dataset with each loader and prints the best times.
+
+    Arguments:
+        url {str} -- dataset location, formatted with the dataset name
+        repeat {int} -- number of timed writes per loader and table
+
+    Returns:
+        dict -- best seconds per loader, summed over all tables
+    """
+    db = PostgresDB()
+    (frames, transposed, provinces) = ({}, {}, {})
+    for dset in db.dsets:
+        raw = pd.read_csv(url.format(dset.split("_")[0]))
+        (transposed[dset], provinces[dset]) = db.prepare(raw)
+    frames["bench_country_series"] = derived.country_series(transposed)
+    frames["bench_province_series"] = derived.province_series(provinces)
+    results = {}
+    for loader in ["to_sql", "copy"]:
+        db.loader = loader
+        total = 0
+        for table, frame in frames.items():
+            times = []
+            for _ in range(repeat):
+                with db.engine.begin() as conn:
+                    times.append(db.write_frame(conn, frame, table, replace=True))
+            total += min(times)
+            print("{:<10} {:<32} {:>8} rows {:>8.3f}s".format(loader, table, len(frame), min(times)))
+        results[loader] = total
+    with db.engine.begin() as conn:
+        for table in frames:
+            conn.execute("DROP TABLE IF EXISTS {}".format(quote(table)))
+    print(
+        "Total: to_sql {:.3f}s, copy {:.3f}s ({:.1f}x)".format(
+            results["to_sql"], results["copy"], results["to_sql"] / results["copy"]
+        )
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the to_sql and COPY loaders.")
+    parser.add_argument("--url", default=URL, help="dataset URL or local path template")
+    parser.add_argument("--repeat", type=int, default=3, help="timed writes per table")
+    args = parser.parse_args()
+    run(args.url, args.repeat)
@@ -0,0 +1,189 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Benchmark suite for the ingest, the queries and the Dash callbacks, run against
+synthetic JHU-shaped data (benchmarks/synthetic.py).
+
+The formatting stages need no database. The ingest, query and callback stages load
+the synthetic data into the Postgres database at DATABASE_URL, so point it at a
+local, disposable database. Results are written as JSON and can be compared with an
+earlier run:
+
+    python -m benchmarks.run --days 600 --output bench.json --compare old.json
+"""
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import tempfile
+import statistics
+
+import flask
+import pandas as pd
+from benchmarks import synthetic
+from utils.db_interface import PostgresDB
+from utils.backends import get_backend
+
+
+def measure(func, repeat, setup=None):
+    """Times repeated calls of func.
+
+    Arguments:
+        func {function} -- function to time, called without arguments
+        repeat {int} -- number of timed calls
+
+    Keyword Arguments:
+        setup {function} -- called before every timed call, untimed
+
+    Returns:
+        dict -- min, median and mean seconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+    }
+
+
+def bench_formatting(raw, repeat):
+    """Times format_df and clean_data on the raw synthetic datasets."""
+    results = {}
+    for name, df in raw.items():
+        results["format_df[{}]".format(name)] = measure(
+            lambda: PostgresDB.format_df(df.copy()), repeat
+        )
+        transposed = df.drop(columns=["Province/State", "Lat", "Long"])
+        transposed = transposed.groupby("Country/Region").sum().T
+        results["clean_data[{}]".format(name)] = measure(
+            lambda: PostgresDB.clean_data(transposed.copy()), repeat
+        )
+    return results
+
+
+def bench_database(url, repeat):
+    """Times the ingest, the queries and the callbacks against DATABASE_URL."""
+    results = {}
+    db = PostgresDB()
+    results["create_tables[full]"] = measure(lambda: db.create_tables(url=url, full=True), 1)
+    results["create_tables[incremental]"] = measure(lambda: db.create_tables(url=url), 1)
+
+    results["import_app"] = measure(lambda: __import__("app"), 1)
+    import app
+
+    sql = get_backend()
+    countries = [PostgresDB.clean_name(name) for name in sql.overview_query()["country"]][:5]
+    results["overview_query"] = measure(sql.overview_query, repeat)
+    results["global_total"] = measure(sql.global_total, repeat)
+    results["country_query"] = measure(lambda: [sql.country_query(c) for c in countries], repeat)
+    regions = [(c, p) for c in countries for p in sql.province_list(c) or []][:5]
+    results["province_query"] = measure(
+        lambda: [sql.province_query(c, p) for c, p in regions], repeat
+    )
+
+    def cold():
+        app.frames.clear()
+        app.figures.clear()
+        app.cache.clear()
+
+    def update_country():
+        figures = {
+            name: dict(data=[], layout=dict(xaxis={}))
+            for name in ["stats_fig", "total_fig", "rates_fig", "pie_fig"]
+        }
+        # Bound by name, so a change to the callback's parameters fails here rather
+        # than shifting the arguments.
+        arguments = inspect.signature(app.update_country).bind(
+            _=1,
+            _2=None,
+            clickData=None,
+            total_relayout=None,
+            rates_relayout=None,
+            province=None,
+            scale="absolute",
+            country=countries[0],
+            stored_country=None,
+            **figures
+        )
+        with app.server.test_request_context():
+            flask.g.triggered_inputs = [{"prop_id": "select-country.n_clicks", "value": 1}]
+            app.update_country(*arguments.args)
+
+    callbacks = {
+        "load_overview": lambda: app.load_overview(None, None),
+        "page_load": lambda: app.page_load(None, dict(data=[], layout={})),
+        "update_country": update_country,
+    }
+    for name, callback in callbacks.items():
+        results["{}[cold]".format(name)] = measure(callback, repeat, setup=cold)
+        results["{}[warm]".format(name)] = measure(callback, repeat)
+    return results
+
+
+def compare(results, previous):
+    """Prints the median of every benchmark next to an earlier run's."""
+    print("{:<32} {:>10} {:>10} {:>8}".format("benchmark", "previous", "current", "ratio"))
+    for name, stats in results["benchmarks"].items():
+        before = previous["benchmarks"].get(name)
+        if before is None:
+            continue
+        print(
+            "{:<32} {:>10.4f} {:>10.4f} {:>7.2f}x".format(
+                name, before["median"], stats["median"], stats["median"] / before["median"]
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard on synthetic data.")
+    parser.add_argument("--countries", type=int, default=190)
+    parser.add_argument("--provinces", type=int, default=10)
+    parser.add_argument("--days", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-db", action="store_true", help="skip the Postgres stages")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    scale = dict(countries=args.countries, provinces=args.provinces, days=args.days, seed=args.seed)
+    results = {
+        "scale": scale,
+        "environment": {
+            "python": sys.version.split()[0],
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        url = synthetic.write_datasets(directory, **scale)
+        raw = {name: pd.read_csv(url.format(name)) for name in ["confirmed", "recovered", "deaths"]}
+        results["benchmarks"].update(bench_formatting(raw, args.repeat))
+        if not args.no_db and "DATABASE_URL" in os.environ:
+            results["benchmarks"].update(bench_database(url, args.repeat))
+
+    for name, stats in results["benchmarks"].items():
+        print("{:<32} median {:>9.4f}s  min {:>9.4f}s".format(name, stats["median"], stats["min"]))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+    if args.compare:
+        with open(args.compare, "r") as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
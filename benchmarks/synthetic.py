@@ -0,0 +1,135 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Generates synthetic datasets shaped like the JHU global time series CSVs, at any
+scale, so that the ingest and the dashboard can be benchmarked without the live data.
+The same seed always produces the same files.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+FILE_NAME = "time_series_covid19_{}_global.csv"
+COUNTY_FILE_NAME = "time_series_covid19_{}_US.csv"
+
+
+def make_datasets(countries=190, provinces=10, days=300, seed=0):
+    """Builds the confirmed, recovered and deaths datasets.
+
+    Every tenth country is split into provinces; the rest have a single row with an
+    empty Province/State, as in the JHU files.
+
+    Keyword Arguments:
+        countries {int} -- number of countries
+        provinces {int} -- provinces of each split country
+        days {int} -- number of date columns, starting 1/22/20
+        seed {int} -- random seed
+
+    Returns:
+        dict -- raw dataframes keyed by JHU dataset name
+    """
+    rng = np.random.RandomState(seed)
+    regions = []
+    for country in range(countries):
+        name = "Country {:03d}".format(country)
+        if country % 10 == 0:
+            regions += [("Province {:02d}".format(p), name) for p in range(provinces)]
+        else:
+            regions.append((np.nan, name))
+    n = len(regions)
+    dates = pd.date_range("2020-01-22", periods=days)
+    columns = ["{}/{}/{:%y}".format(date.month, date.day, date) for date in dates]
+    outbreak = rng.randint(0, days, n)
+    started = np.arange(days)[None, :] >= outbreak[:, None]
+    confirmed = (rng.poisson(rng.uniform(0.5, 50, n)[:, None], (n, days)) * started).cumsum(axis=1)
+    deaths = (confirmed * rng.uniform(0.01, 0.05, n)[:, None]).astype(int)
+    recovered = np.zeros_like(confirmed)
+    recovered[:, 14:] = (confirmed[:, :-14] * rng.uniform(0.5, 0.9, n)[:, None]).astype(int)
+    regions = pd.DataFrame(regions, columns=["Province/State", "Country/Region"])
+    regions["Lat"] = rng.uniform(-60, 70, n).round(4)
+    regions["Long"] = rng.uniform(-180, 180, n).round(4)
+    return {
+        name: pd.concat([regions, pd.DataFrame(values, columns=columns)], axis=1)
+        for name, values in [("confirmed", confirmed), ("recovered", recovered), ("deaths", deaths)]
+    }
+
+
+def write_datasets(directory, **kwargs):
+    """Writes the synthetic datasets as CSV files.
+
+    Arguments:
+        directory {str} -- destination directory
+        **kwargs -- passed to make_datasets()
+
+    Returns:
+        str -- path template accepted by PostgresDB.create_tables(url=...)
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, df in make_datasets(**kwargs).items():
+        df.to_csv(os.path.join(directory, FILE_NAME.format(name)), index=False)
+    return os.path.join(directory, FILE_NAME)
+
+
+def make_county_datasets(counties=3300, days=300, seed=0):
+    """Builds the confirmed and deaths county datasets, with the columns of the JHU
+    US files. Only the deaths dataset has a Population column, as in the JHU files.
+
+    Keyword Arguments:
+        counties {int} -- number of counties, spread over 50 states
+        days {int} -- number of date columns, starting 1/22/20
+        seed {int} -- random seed
+
+    Returns:
+        dict -- raw dataframes keyed by JHU dataset name
+    """
+    rng = np.random.RandomState(seed)
+    n = counties
+    dates = pd.date_range("2020-01-22", periods=days)
+    columns = ["{}/{}/{:%y}".format(date.month, date.day, date) for date in dates]
+    outbreak = rng.randint(0, days, n)
+    started = np.arange(days)[None, :] >= outbreak[:, None]
+    confirmed = (rng.poisson(rng.uniform(0.1, 20, n)[:, None], (n, days)) * started).cumsum(axis=1)
+    deaths = (confirmed * rng.uniform(0.005, 0.03, n)[:, None]).astype(int)
+    fips = 1000 + np.arange(n)
+    regions = pd.DataFrame(
+        {
+            "UID": 84000000 + fips,
+            "iso2": "US",
+            "iso3": "USA",
+            "code3": 840,
+            "FIPS": fips.astype(float),
+            "Admin2": ["County {:04d}".format(i) for i in range(n)],
+            "Province_State": ["State {:02d}".format(i % 50) for i in range(n)],
+            "Country_Region": "US",
+            "Lat": rng.uniform(25, 49, n).round(4),
+            "Long_": rng.uniform(-124, -67, n).round(4),
+        }
+    )
+    regions["Combined_Key"] = regions["Admin2"] + ", " + regions["Province_State"] + ", US"
+    population = pd.DataFrame({"Population": rng.randint(1000, 1000000, n)})
+    return {
+        "confirmed": pd.concat([regions, pd.DataFrame(confirmed, columns=columns)], axis=1),
+        "deaths": pd.concat(
+            [regions, population, pd.DataFrame(deaths, columns=columns)], axis=1
+        ),
+    }
+
+
+def write_county_datasets(directory, **kwargs):
+    """Writes the synthetic county datasets as CSV files.
+
+    Arguments:
+        directory {str} -- destination directory
+        **kwargs -- passed to make_county_datasets()
+
+    Returns:
+        str -- path template accepted by CountyDB.create_tables(url=...)
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, df in make_county_datasets(**kwargs).items():
+        df.to_csv(os.path.join(directory, COUNTY_FILE_NAME.format(name)), index=False)
+    return os.path.join(directory, COUNTY_FILE_NAME)
@@ -11,10 +11,23 @@ import dash_core_components as dcc
 import dash_html_components as html
 import plotly.graph_objects as go
 
+compare_layout = dict(
+    legend=dict(x=0.01, y=1),
+    showlegend=True,
+    margin={"t": 5, "b": 0},
+    paper_bgcolor="rgb(60, 60, 60)",
+    plot_bgcolor="rgb(60, 60, 60)",
+    dragmode="pan",
+    font=dict(family="Courier New, monospace", size=18, color="rgb(228, 241, 250)"),
+    yaxis=dict(gridcolor="rgb(121, 117, 117)", fixedrange=True),
+    xaxis=dict(gridcolor="rgb(121, 117, 117)", tickangle=45, title=dict(text="Date")),
+)
+
 layout = html.Div(
     className="main-div",
     children=[
         dcc.Store(id="country-store", storage_type="session"),
+        dcc.Store(id="overview-store", storage_type="session"),
         html.Div(
             [
                 html.Div(
@@ -116,6 +129,15 @@ layout = html.Div(
                             ],
                             style=dict(width="60%", marginTop="10px"),
                         ),
+                        dcc.RadioItems(
+                            id="overview-scale",
+                            options=[
+                                {"label": "Absolute", "value": "absolute"},
+                                {"label": "Per 100k", "value": "per_capita"},
+                            ],
+                            value="absolute",
+                            style=dict(marginLeft="20px", marginTop="10px"),
+                        ),
                     ],
                     style=dict(display="flex"),
                 ),
@@ -136,13 +158,32 @@ layout = html.Div(
                                     type="text",
                                     value="US",
                                     debounce=True,
+                                    list="country-options",
+                                    autoComplete="off",
                                     style=dict(width="50%", marginRight="20px"),
                                 ),
+                                html.Datalist(id="country-options"),
                                 html.Button(
                                     "SELECT",
                                     id="select-country",
                                     style=dict(color="rgb(228, 241, 250)"),
                                 ),
+                                dcc.Dropdown(
+                                    id="choose-province",
+                                    placeholder="All provinces",
+                                    style=dict(
+                                        color="rgb(45, 45, 45)", width="80%", marginTop="10px"
+                                    ),
+                                ),
+                                dcc.RadioItems(
+                                    id="country-scale",
+                                    options=[
+                                        {"label": "Absolute", "value": "absolute"},
+                                        {"label": "Per 100k", "value": "per_capita"},
+                                    ],
+                                    value="absolute",
+                                    style=dict(marginTop="10px"),
+                                ),
                             ],
                             style=dict(
                                 textAlign="left", marginBottom="1%", width="31%"
@@ -382,6 +423,172 @@ layout = html.Div(
                     ],
                     style=dict(display="flex"),
                 ),
+                html.Div(
+                    [
+                        html.Div(
+                            [
+                                html.H4("Indicators"),
+                                dcc.RadioItems(
+                                    id="indicator-choice",
+                                    options=[
+                                        {"label": "7-day average", "value": "average"},
+                                        {"label": "Growth rate", "value": "growth_rate"},
+                                        {"label": "Doubling time", "value": "doubling_time"},
+                                        {"label": "R estimate", "value": "reproduction_number"},
+                                    ],
+                                    value="average",
+                                ),
+                                html.H5("Series:"),
+                                dcc.RadioItems(
+                                    id="indicator-metric",
+                                    options=[
+                                        {"label": "confirmed_cases", "value": "confirmed_cases"},
+                                        {"label": "deaths", "value": "deaths"},
+                                    ],
+                                    value="confirmed_cases",
+                                ),
+                            ],
+                            style=dict(width="20%", textAlign="left", marginLeft="20px"),
+                        ),
+                        html.Div(
+                            [
+                                dcc.Loading(
+                                    type="dot",
+                                    children=[
+                                        dcc.Graph(
+                                            id="country-indicators",
+                                            config={"displayModeBar": False},
+                                            figure=go.Figure(layout=compare_layout),
+                                        ),
+                                    ],
+                                )
+                            ],
+                            className="cases-line-div2",
+                            style=dict(width="80%"),
+                        ),
+                    ],
+                    style=dict(display="flex"),
+                ),
+            ],
+            className="country-div",
+        ),
+        html.Div(
+            [
+                html.H2(
+                    children="Compare Countries",
+                    style=dict(marginTop="0px", textAlign="center"),
+                ),
+                html.Div(
+                    [
+                        html.Div(
+                            [
+                                html.H5("Countries (up to 10):"),
+                                dcc.Dropdown(
+                                    id="compare-countries",
+                                    multi=True,
+                                    value=["us", "italy", "south_korea"],
+                                    style=dict(color="rgb(45, 45, 45)"),
+                                ),
+                            ],
+                            style=dict(width="40%", textAlign="left", marginRight="20px"),
+                        ),
+                        html.Div(
+                            [
+                                html.H5("Series:"),
+                                dcc.RadioItems(
+                                    id="compare-metric",
+                                    options=[
+                                        {"label": dset, "value": dset}
+                                        for dset in [
+                                            "confirmed_cases",
+                                            "active_cases",
+                                            "recovered_cases",
+                                            "deaths",
+                                        ]
+                                    ],
+                                    value="confirmed_cases",
+                                ),
+                            ],
+                            style=dict(width="20%", textAlign="left"),
+                        ),
+                        html.Div(
+                            [
+                                html.H5("Align by:"),
+                                dcc.RadioItems(
+                                    id="compare-align",
+                                    options=[
+                                        {"label": "Date", "value": "date"},
+                                        {"label": "Days since case N", "value": "days"},
+                                    ],
+                                    value="date",
+                                ),
+                                dcc.Input(
+                                    id="compare-threshold",
+                                    type="number",
+                                    min=1,
+                                    value=100,
+                                    debounce=True,
+                                    style=dict(width="50%"),
+                                ),
+                            ],
+                            style=dict(width="20%", textAlign="left"),
+                        ),
+                        html.Div(
+                            [
+                                html.H5("Scale:"),
+                                dcc.RadioItems(
+                                    id="compare-normalise",
+                                    options=[
+                                        {"label": "Absolute", "value": "absolute"},
+                                        {"label": "% of peak", "value": "peak"},
+                                    ],
+                                    value="absolute",
+                                ),
+                            ],
+                            style=dict(width="20%", textAlign="left"),
+                        ),
+                    ],
+                    style=dict(display="flex", marginLeft="20px"),
+                ),
+                html.Div(
+                    [
+                        html.Div(
+                            [
+                                dcc.Loading(
+                                    type="dot",
+                                    children=[
+                                        html.H4("Cumulative"),
+                                        dcc.Graph(
+                                            id="compare-total",
+                                            config={"displayModeBar": False},
+                                            figure=go.Figure(layout=compare_layout),
+                                        ),
+                                    ],
+                                )
+                            ],
+                            className="cases-line-div2",
+                            style=dict(width="50%"),
+                        ),
+                        html.Div(
+                            [
+                                dcc.Loading(
+                                    type="dot",
+                                    children=[
+                                        html.H4("Daily"),
+                                        dcc.Graph(
+                                            id="compare-daily",
+                                            config={"displayModeBar": False},
+                                            figure=go.Figure(layout=compare_layout),
+                                        ),
+                                    ],
+                                )
+                            ],
+                            className="cases-line-div2",
+                            style=dict(width="50%"),
+                        ),
+                    ],
+                    style=dict(display="flex"),
+                ),
             ],
             className="country-div",
         ),
@@ -0,0 +1,44 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Shared fixtures. Tests that write to Postgres need DATABASE_URL to point at a
+disposable database and are skipped without it. Writes through connection are rolled
+back; ingests through ingest_db commit.
+"""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def connection():
+    """Connection to the test database inside a transaction that is rolled back."""
+    if not os.environ.get("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+
+    engine = sqlalchemy.create_engine(os.environ["DATABASE_URL"])
+    conn = engine.connect()
+    transaction = conn.begin()
+    yield conn
+    transaction.rollback()
+    conn.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def ingest_db():
+    """PostgresDB ingesting into the test database, without snapshot or export.
+    Ingests commit, so they replace the database's derived tables."""
+    if not os.environ.get("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    pytest.importorskip("pandas")
+    from utils.db_interface import PostgresDB
+
+    db = PostgresDB(loader="copy")
+    (db.snapshot_dir, db.export_dir, db.revision_days) = ("", "", 7)
+    yield db
+    db.engine.dispose()
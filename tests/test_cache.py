@@ -0,0 +1,31 @@
+import sys
+
+from utils.cache import TieredCache
+
+
+def test_sizeof_counts_bytes_of_container_elements():
+    names = ["country {:03d}".format(i) for i in range(100)]
+    size = TieredCache.sizeof(names)
+    assert size >= sys.getsizeof(names) + sum(sys.getsizeof(name) for name in names)
+    assert TieredCache.sizeof({"traces": names}) > size
+    assert TieredCache.sizeof((names, names)) > 2 * size
+
+
+def test_memoize_skips_empty_results_unless_asked():
+    cache = TieredCache()
+    calls = []
+
+    @cache.memoize()
+    def failing():
+        calls.append("failing")
+        return []
+
+    @cache.memoize(cache_empty=True)
+    def empty():
+        calls.append("empty")
+        return []
+
+    for _ in range(2):
+        failing()
+        empty()
+    assert calls == ["failing", "empty", "failing"]
@@ -0,0 +1,38 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from benchmarks.synthetic import make_county_datasets
+from utils.counties import CountyDB, METRICS
+from utils.db_interface import read_template
+
+
+def summarise(counties=5, days=4):
+    datasets = make_county_datasets(counties=counties, days=days)
+    chunks = {
+        metric: CountyDB.format_chunk(datasets[name], metric)
+        for (name, metric) in METRICS.items()
+    }
+    return chunks, CountyDB.join_summaries({m: chunk[1] for (m, chunk) in chunks.items()})
+
+
+def test_join_summaries_casts_every_count_to_integer():
+    (_, summary) = summarise()
+    columns = ["population"] + list(METRICS.values())
+    columns += ["ref_{}".format(metric) for metric in METRICS.values()]
+    for column in columns:
+        assert str(summary[column].dtype) == "Int64"
+
+
+def test_county_frames_load_with_copy(connection):
+    (chunks, summary) = summarise()
+    connection.execute(read_template("sql/counties/create_tables.txt"))
+    connection.execute("TRUNCATE county_series")
+    connection.execute("DELETE FROM county_summary")
+    db = CountyDB(loader="copy")
+    for (long_df, _) in chunks.values():
+        db.write_frame(connection, long_df, "county_series")
+    db.write_frame(connection, summary, "county_summary")
+    loaded = pd.read_sql("SELECT * FROM county_summary ORDER BY uid", connection)
+    assert len(loaded) == len(summary)
+    assert loaded["ref_deaths"].tolist() == summary["ref_deaths"].astype(int).tolist()
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from benchmarks import synthetic
+
+TABLES = {
+    "country_series": ["country", "date"],
+    "province_series": ["country", "province", "date"],
+    "country_summary": ["country"],
+}
+INFO_COLUMNS = 4
+
+
+def write_datasets(directory, raw, days=None, drop=()):
+    """Writes the synthetic datasets truncated to their first days dates and without
+    the rows at the drop positions, which must exist in every dataset."""
+    os.makedirs(str(directory), exist_ok=True)
+    for (name, df) in raw.items():
+        if days is not None:
+            df = df.iloc[:, : INFO_COLUMNS + days]
+        df.drop(index=list(drop)).to_csv(
+            os.path.join(str(directory), synthetic.FILE_NAME.format(name)), index=False
+        )
+    return os.path.join(str(directory), synthetic.FILE_NAME)
+
+
+def read_tables(db):
+    with db.engine.connect() as conn:
+        return {
+            table: pd.read_sql_query(
+                "SELECT * FROM {} ORDER BY {}".format(table, ", ".join(keys)), conn
+            )
+            for (table, keys) in TABLES.items()
+        }
+
+
+def assert_incremental_matches_full(db, before, after):
+    db.create_tables(url=before, full=True)
+    rows = db.create_tables(url=after)
+    incremental = read_tables(db)
+    db.create_tables(url=after, full=True)
+    full = read_tables(db)
+    for table in TABLES:
+        pd.testing.assert_frame_equal(incremental[table], full[table], check_like=True)
+    return rows, full
+
+
+def test_incremental_ingest_matches_full_rebuild(ingest_db, tmp_path):
+    raw = synthetic.make_datasets(countries=30, provinces=3, days=65)
+    # A first death after the first load's last date and inside the second load's
+    # revised window, in a province (row 0) and a national-only country (row 3), is
+    # where the two ingests used to disagree.
+    for row in [0, 3]:
+        raw["deaths"].iloc[row, INFO_COLUMNS:] = [0] * 63 + [1, 2]
+    (rows, full) = assert_incremental_matches_full(
+        ingest_db,
+        write_datasets(tmp_path / "before", raw, days=60),
+        write_datasets(tmp_path / "after", raw),
+    )
+    assert rows["country_series"] < len(full["country_series"])
+
+
+# Rows 0-2 are the provinces of the first country, row 3 a national-only country.
+@pytest.mark.parametrize("position", [3, 0], ids=["country", "province"])
+def test_incremental_ingest_with_new_series_rewrites_in_full(ingest_db, tmp_path, position):
+    raw = synthetic.make_datasets(countries=30, provinces=3, days=65)
+    (rows, full) = assert_incremental_matches_full(
+        ingest_db,
+        write_datasets(tmp_path / "before", raw, days=60, drop=[position]),
+        write_datasets(tmp_path / "after", raw),
+    )
+    table = "country_series" if position else "province_series"
+    assert rows[table] == len(full[table])
@@ -0,0 +1,27 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from benchmarks.synthetic import make_datasets
+from utils import derived
+from utils.db_interface import PostgresDB, read_template
+
+
+def test_derived_series_load_with_copy(connection):
+    raw = make_datasets(countries=20, provinces=3, days=5)
+    (transposed, provinces) = ({}, {})
+    for dset in derived.DSETS:
+        (transposed[dset], provinces[dset]) = PostgresDB.prepare(raw[dset.split("_")[0]])
+    frames = {
+        "country_series": derived.country_series(transposed),
+        "province_series": derived.province_series(provinces),
+    }
+    connection.execute(read_template("sql/create_derived_tables.txt"))
+    db = PostgresDB(loader="copy")
+    for (table, frame) in frames.items():
+        connection.execute("DELETE FROM {}".format(table))
+        db.write_frame(connection, frame, table)
+        loaded = connection.execute(
+            "SELECT count(*), count(*) - count(confirmed_cases) FROM {}".format(table)
+        ).fetchone()
+        assert tuple(loaded) == (len(frame), int(frame["confirmed_cases"].isna().sum()))
@@ -0,0 +1,583 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module defining the data backends queried by the app.
+    Backend is the interface every backend implements. PostgresQueries (in
+    db_interface) queries the derived tables; FileBackend reads the Parquet files
+    exported by the ingest, so small deployments can run without a database.
+    DATA_BACKEND selects the backend ("postgres" or "files").
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import logging as log
+from threading import Lock
+from datetime import datetime
+
+import pandas as pd
+from utils import derived, instrumentation, snapshot
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+SERIES_COLUMNS = [
+    "date",
+    "confirmed_cases",
+    "recovered_cases",
+    "deaths",
+    "active_cases",
+    "new_confirmed_cases",
+    "new_recovered_cases",
+    "new_deaths",
+]
+# Only country_series carries per-100k columns; provinces have no population.
+COUNTRY_SERIES_COLUMNS = SERIES_COLUMNS + [
+    "{}_per_100k".format(column) for column in SERIES_COLUMNS[1:]
+]
+OVERVIEW_COLUMNS = [
+    "confirmed_cases",
+    "active_cases",
+    "recovered_cases",
+    "deaths",
+    "ref_confirmed_cases",
+    "ref_active_cases",
+    "ref_recovered_cases",
+    "ref_deaths",
+]
+# Smaller countries are left out of the per-capita overview ranking, where a few
+# cases would otherwise rank them first.
+MIN_POPULATION = 1000000
+
+
+class Backend:
+    def __init__(self):
+        """Interface of the data backends. Subclasses implement read_metadata() and
+        the queries; the data version and latest dates are tracked here from the
+        metadata recorded by the ingest.
+        """
+        self.version_check_seconds = int(os.environ.get("DATA_VERSION_CHECK_SECONDS", 60))
+        self.data_version = ""
+        self.last_columns = ""
+        self._next_check = 0
+        self._failures = 0
+
+    def after_fork(self):
+        """Called in a forked child before the backend is first used there."""
+
+    def read_metadata(self):
+        """Reads the key/value pairs recorded by the last ingest.
+
+        Returns:
+            dict -- metadata values keyed by name, empty if unavailable
+        """
+        raise NotImplementedError
+
+    def overview_query(self, per_capita=False):
+        """Retrieves the data of the 20 worst affected countries.
+
+        Keyword Arguments:
+            per_capita {bool} -- rank and report values per 100k people, among
+                                 countries of at least MIN_POPULATION
+
+        Returns:
+            dataframe -- overview data
+        """
+        raise NotImplementedError
+
+    def country_query(self, country):
+        """Retrieves the time series of one country.
+
+        Arguments:
+            country {string} -- country to query
+
+        Returns:
+            dataframe -- dataframe of country data, indexed by date
+        """
+        raise NotImplementedError
+
+    def country_list(self):
+        """Retrieves the names of every country with data.
+
+        Returns:
+            list -- normalised country names, sorted
+        """
+        raise NotImplementedError
+
+    def country_query_many(self, countries, start=None, end=None):
+        """Retrieves the time series of several countries.
+
+        Arguments:
+            countries {list} -- countries to query
+
+        Keyword Arguments:
+            start {date} -- first date to include, unbounded if None
+            end {date} -- last date to include, unbounded if None
+
+        Returns:
+            dataframe -- dataframe of country data, indexed by (country, date)
+        """
+        raise NotImplementedError
+
+    def province_list(self, country):
+        """Retrieves the provinces of a country reported by province.
+
+        Arguments:
+            country {string} -- normalised country name
+
+        Returns:
+            list -- province names, sorted; empty for national-only countries, None if
+                    unavailable
+        """
+        raise NotImplementedError
+
+    def province_query(self, country, province):
+        """Retrieves the time series of one province.
+
+        Arguments:
+            country {string} -- normalised country name
+            province {string} -- province name, as returned by province_list()
+
+        Returns:
+            dataframe -- dataframe of province data, indexed by date
+        """
+        raise NotImplementedError
+
+    def current_version(self):
+        """Returns the data version, re-reading it at most every version_check_seconds.
+        last_columns is recomputed whenever the version changes. Nothing is read until
+        the first call; if the metadata is unavailable the read is retried with
+        exponential backoff, capped at version_check_seconds.
+
+        Returns:
+            str -- current data version; "" until the metadata has been read
+        """
+        now = time.monotonic()
+        if now >= self._next_check:
+            metadata = self.read_metadata()
+            if metadata.get("latest_date"):
+                self._failures = 0
+                self._next_check = now + self.version_check_seconds
+                version = metadata.get("data_version", "")
+                if version != self.data_version or not len(self.last_columns):
+                    log.info(
+                        "Data version changed from {} to {}".format(self.data_version, version)
+                    )
+                    self.last_columns = self.find_last_columns(metadata)
+                    self.data_version = version
+            else:
+                self._failures = min(self._failures + 1, 16)
+                delay = min(2 ** self._failures / 2, self.version_check_seconds)
+                self._next_check = now + delay
+                log.warning("Ingest metadata unavailable, retrying in {}s".format(delay))
+        return self.data_version
+
+    def ready(self):
+        """Checks whether the ingest metadata has been read.
+
+        Returns:
+            bool -- True once last_columns is available
+        """
+        self.current_version()
+        return bool(len(self.last_columns))
+
+    def find_last_columns(self, metadata=None):
+        """Determines the two most recent dates, as recorded by the ingest.
+
+        Keyword Arguments:
+            metadata {dict} -- metadata already read by read_metadata()
+
+        Returns:
+            Series -- two most recent dates, as date column names (e.g. _4_10_20).
+        """
+        metadata = metadata if metadata is not None else self.read_metadata()
+        try:
+            dates = pd.to_datetime([metadata["latest_date"], metadata["previous_date"]])
+        except KeyError:
+            log.error("Last column not found")
+            return ""
+        return pd.Series(
+            ["_{}_{}_{:%y}".format(d.month, d.day, d) for d in dates], name="column_name"
+        )
+
+    @instrumentation.query_seconds.time("method")
+    def global_total(self):
+        """Reads the global totals of the two most recent dates recorded by the ingest.
+
+        Returns:
+            dataframe -- dataframe of global totals, indexed by ascending date
+        """
+        try:
+            totals = json.loads(self.read_metadata()["global_totals"])
+        except KeyError:
+            log.error("Global Total Data Unavailable")
+            return []
+        result = pd.DataFrame.from_dict(totals, orient="index").sort_index()
+        log.debug("Global total result: {}".format(result))
+        return result
+
+
+class FileBackend(Backend):
+    def __init__(self, directory=None):
+        """Backend reading the Parquet files written by export(). Queries read only
+        the columns they need, and country queries only the row groups whose
+        statistics can contain the requested countries and dates.
+
+        Keyword Arguments:
+            directory {str} -- export directory; defaults to the FILE_BACKEND_DIR
+                               environment variable, then data-directory
+        """
+        if pq is None:
+            raise ImportError("The file backend requires pyarrow")
+        Backend.__init__(self)
+        self.directory = directory or os.environ.get("FILE_BACKEND_DIR") or "data-directory"
+
+    def path(self, name):
+        """Path of an exported file of the current data version.
+
+        Arguments:
+            name {str} -- file name
+
+        Returns:
+            str -- file path
+        """
+        version = self.data_version or self.current_version()
+        return os.path.join(self.directory, version, name)
+
+    @instrumentation.query_seconds.time("method")
+    def read_metadata(self):
+        """Reads the key/value pairs exported with the current version.
+
+        Returns:
+            dict -- metadata values keyed by name, empty if unavailable
+        """
+        try:
+            with open(os.path.join(self.directory, "CURRENT")) as f:
+                version = f.read().strip()
+            with open(os.path.join(self.directory, version, "metadata.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            log.warning("Ingest metadata unavailable")
+            return {}
+
+    @instrumentation.query_seconds.time("method")
+    def overview_query(self, per_capita=False):
+        """Reads the data of the 20 worst affected countries from country_summary.
+
+        Keyword Arguments:
+            per_capita {bool} -- rank and report values per 100k people, among
+                                 countries of at least MIN_POPULATION
+
+        Returns:
+            dataframe -- overview data
+        """
+        try:
+            columns = OVERVIEW_COLUMNS
+            filters = None
+            if per_capita:
+                columns = ["{}_per_100k".format(column) for column in OVERVIEW_COLUMNS]
+                filters = [("population", ">=", MIN_POPULATION)]
+            summary = pq.read_table(
+                self.path("country_summary.parquet"),
+                columns=["country"] + columns,
+                filters=filters,
+            )
+        except (OSError, pa.ArrowException):
+            log.error("Overview Query Failed")
+            return []
+        summary = summary.to_pandas().rename(columns=dict(zip(columns, OVERVIEW_COLUMNS)))
+        overview = summary.nlargest(20, "confirmed_cases").reset_index(drop=True)
+        overview["country"] = overview["country"].str.replace("_", " ").str.upper()
+        return overview
+
+    @instrumentation.query_seconds.time("method")
+    def country_query(self, country):
+        """Reads all time series data for a specified country from country_series.
+
+        Arguments:
+            country {string} -- country to query
+
+        Returns:
+            dataframe -- dataframe of country data, indexed by date
+        """
+        results = self.read_series([country])
+        if not len(results):
+            return results
+        return results.drop(columns="country").set_index("date")
+
+    @instrumentation.query_seconds.time("method")
+    def country_list(self):
+        """Reads the names of every country with data.
+
+        Returns:
+            list -- normalised country names, sorted
+        """
+        try:
+            summary = pq.read_table(self.path("country_summary.parquet"), columns=["country"])
+        except (OSError, pa.ArrowException):
+            log.error("Country list unavailable")
+            return []
+        return sorted(summary.column("country").to_pylist())
+
+    @instrumentation.query_seconds.time("method")
+    def country_query_many(self, countries, start=None, end=None):
+        """Reads the time series of several countries from country_series.
+
+        Arguments:
+            countries {list} -- countries to query
+
+        Keyword Arguments:
+            start {date} -- first date to include, unbounded if None
+            end {date} -- last date to include, unbounded if None
+
+        Returns:
+            dataframe -- dataframe of country data, indexed by (country, date)
+        """
+        results = self.read_series(countries, start, end)
+        if not len(results):
+            return results
+        return results.set_index(["country", "date"])
+
+    @instrumentation.query_seconds.time("method")
+    def province_list(self, country):
+        """Reads the provinces of a country from province_series.
+
+        Arguments:
+            country {string} -- normalised country name
+
+        Returns:
+            list -- province names, sorted; empty for national-only countries, None if
+                    unavailable
+        """
+        try:
+            table = pq.read_table(
+                self.path("province_series.parquet"),
+                columns=["province"],
+                filters=[("country", "=", country.lower())],
+            )
+        except (OSError, pa.ArrowException):
+            log.error("Province list unavailable")
+            return None
+        return sorted(set(table.column("province").to_pylist()))
+
+    @instrumentation.query_seconds.time("method")
+    def province_query(self, country, province):
+        """Reads all time series data for one province from province_series.
+
+        Arguments:
+            country {string} -- normalised country name
+            province {string} -- province name
+
+        Returns:
+            dataframe -- dataframe of province data, indexed by date
+        """
+        try:
+            table = pq.read_table(
+                self.path("province_series.parquet"),
+                columns=SERIES_COLUMNS,
+                filters=[("country", "=", country.lower()), ("province", "=", province)],
+            )
+        except (OSError, pa.ArrowException):
+            log.error("Data unavailable")
+            return pd.DataFrame()
+        return table.to_pandas().sort_values("date").set_index("date")
+
+    def read_series(self, countries, start=None, end=None):
+        """Reads the rows of country_series matching the countries and date range,
+        pushing the filters down to the Parquet reader.
+
+        Arguments:
+            countries {list} -- countries to read
+
+        Keyword Arguments:
+            start {date} -- first date to include, unbounded if None
+            end {date} -- last date to include, unbounded if None
+
+        Returns:
+            dataframe -- matching rows ordered by country and date, empty if none
+        """
+        filters = [("country", "in", [country.lower() for country in countries])]
+        if start is not None:
+            filters.append(("date", ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append(("date", "<=", pd.Timestamp(end)))
+        try:
+            table = pq.read_table(
+                self.path("country_series.parquet"),
+                columns=["country"] + COUNTRY_SERIES_COLUMNS,
+                filters=filters,
+            )
+        except (OSError, pa.ArrowException):
+            log.error("Data unavailable")
+            return pd.DataFrame()
+        return table.to_pandas().sort_values(["country", "date"]).reset_index(drop=True)
+
+
+def export(
+    directory, version, series, summary, metadata, provinces=None, row_group_countries=8
+):
+    """Writes the derived tables and metadata of a data version as Parquet files for
+    FileBackend, then points CURRENT at them. The version directory is renamed into
+    place before CURRENT is replaced, so readers never see a partial export.
+
+    country_series is sorted by country and split into row groups of a few countries
+    each, so the row group statistics let country filters skip most of the file;
+    province_series is sorted and grouped the same way by country and province.
+
+    Arguments:
+        directory {str} -- export directory
+        version {str} -- data version
+        series {dataframe} -- rows returned by country_series()
+        summary {dataframe} -- rows returned by country_summary()
+        metadata {dict} -- values returned by ingest_metadata()
+
+    Keyword Arguments:
+        provinces {dataframe} -- rows returned by province_series()
+        row_group_countries {int} -- countries per country_series row group
+    """
+    if pq is None:
+        raise ImportError("Exporting for the file backend requires pyarrow")
+    os.makedirs(directory, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".{}-".format(version), dir=directory)
+    series = to_float(series.sort_values(["country", "date"]))
+    days = series["date"].nunique()
+    pq.write_table(
+        pa.Table.from_pandas(series, preserve_index=False),
+        os.path.join(tmp, "country_series.parquet"),
+        row_group_size=max(days * row_group_countries, 1),
+    )
+    if provinces is not None:
+        provinces = to_float(provinces.sort_values(["country", "province", "date"]))
+        pq.write_table(
+            pa.Table.from_pandas(provinces, preserve_index=False),
+            os.path.join(tmp, "province_series.parquet"),
+            row_group_size=max(days * row_group_countries, 1),
+        )
+    pq.write_table(
+        pa.Table.from_pandas(to_float(summary), preserve_index=False),
+        os.path.join(tmp, "country_summary.parquet"),
+    )
+    with open(os.path.join(tmp, "metadata.json"), "w") as f:
+        json.dump(metadata, f)
+    path = os.path.join(directory, version)
+    if os.path.isdir(path):
+        shutil.rmtree(tmp, ignore_errors=True)
+    else:
+        os.rename(tmp, path)
+    with open(os.path.join(directory, ".CURRENT"), "w") as f:
+        f.write(version)
+    os.replace(os.path.join(directory, ".CURRENT"), os.path.join(directory, "CURRENT"))
+    snapshot.prune(directory)
+    log.info("Exported data version {} to {}".format(version, path))
+
+
+def to_float(frame):
+    """Converts nullable integer columns to floats, so readers get NaN for missing
+    values as they do from Postgres.
+
+    Arguments:
+        frame {dataframe} -- frame to convert
+
+    Returns:
+        dataframe -- converted copy
+    """
+    columns = frame.select_dtypes("Int64").columns
+    return frame.astype({column: "float64" for column in columns})
+
+
+def ingest_files(
+    directory,
+    url="https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{}_global.csv",
+):
+    """Downloads the datasets and exports them for FileBackend, without a database.
+
+    Arguments:
+        directory {str} -- export directory
+
+    Keyword Arguments:
+        url {str} -- source of raw data
+
+    Returns:
+        str -- data version written
+    """
+    from utils.db_interface import PostgresDB
+
+    (transposed, provinces) = ({}, {})
+    for dset in derived.DSETS:
+        log.info("Reading Dataset: {}".format(dset))
+        df = pd.read_csv(url.format(dset.split("_")[0]))
+        (transposed[dset], provinces[dset]) = PostgresDB.prepare(df)
+    series = derived.country_series(transposed)
+    (series, summary) = derived.add_per_capita(
+        series, derived.country_summary(series), derived.read_population()
+    )
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    metadata = derived.ingest_metadata(series, summary, version)
+    export(directory, version, series, summary, metadata, derived.province_series(provinces))
+    return version
+
+
+_backend = None
+_backend_pid = None
+_backend_lock = Lock()
+
+
+def get_backend():
+    """Returns this process's backend, creating it on first use so that importing
+    the app touches neither the network nor the data. DATA_BACKEND selects
+    "postgres" (default) or "files". When called in a forked child (gunicorn
+    --preload) the backend's after_fork() runs first.
+
+    Returns:
+        Backend -- backend for the current process
+    """
+    global _backend, _backend_pid
+    pid = os.getpid()
+    if _backend_pid != pid:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(os.environ.get("DATA_BACKEND", "postgres"))
+            elif _backend_pid != pid:
+                _backend.after_fork()
+            _backend_pid = pid
+    return _backend
+
+
+def create_backend(name):
+    """Creates a backend by name.
+
+    Arguments:
+        name {str} -- "postgres" or "files"
+
+    Returns:
+        Backend -- new backend
+    """
+    if name == "files":
+        return FileBackend()
+    if name == "postgres":
+        from utils.db_interface import PostgresQueries
+
+        return PostgresQueries()
+    raise ValueError("Unknown data backend {}".format(name))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingest the JHU datasets into Parquet files for the file backend."
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default=os.environ.get("FILE_BACKEND_DIR") or "data-directory",
+        help="export directory",
+    )
+    args = parser.parse_args()
+    ingest_files(args.directory)
@@ -0,0 +1,186 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module providing the two-level cache for query results.
+    Level one is an in-process LRU of live objects bounded by their size in bytes.
+    Level two is a Flask-Caching backend, which pickles values to disk.
+"""
+import sys
+import time
+import logging as log
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from utils import instrumentation
+
+
+class TieredCache:
+    def __init__(
+        self, backend=None, max_bytes=64 * 2 ** 20, version=None, on_change=None, name="cache"
+    ):
+        """In-process LRU cache backed by an optional shared Flask-Caching backend.
+
+        Cached values are shared between callers and must not be modified in place.
+        Memoized keys include the data version; when it changes the in-process level
+        is cleared. The backend is shared by every worker, so its superseded entries
+        are left to expire with its default timeout rather than cleared by each one.
+
+        Keyword Arguments:
+            backend {Cache} -- Flask-Caching cache used as the second level
+            max_bytes {int} -- size at which least recently used entries are evicted
+            version {callable} -- returns the current data version token
+            on_change {callable} -- called with each newly observed version, e.g. to
+                                    warm the cache
+            name {str} -- label of the cache in the instrumentation metrics
+        """
+        self.name = name
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.version = version
+        self.on_change = on_change
+        self.size = 0
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def sizeof(value):
+        """Estimates the memory held by a cached value, counting the elements of
+        containers such as the country lists and tuples of frames.
+
+        Arguments:
+            value {object} -- dataframe, string, bytes, or a list, tuple or dict of them
+
+        Returns:
+            int -- size in bytes
+        """
+        if hasattr(value, "memory_usage"):
+            return int(value.memory_usage(index=True, deep=True).sum())
+        if isinstance(value, dict):
+            items = [item for pair in value.items() for item in pair]
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            items = value
+        else:
+            return sys.getsizeof(value)
+        return sys.getsizeof(value) + sum(TieredCache.sizeof(item) for item in items)
+
+    @staticmethod
+    def is_empty(value):
+        """Whether a value is empty, e.g. the empty frame or list of a failed query.
+
+        Arguments:
+            value {object} -- value to test
+
+        Returns:
+            bool -- True for empty containers and frames
+        """
+        try:
+            return len(value) == 0
+        except TypeError:
+            return False
+
+    def get(self, key):
+        """Looks a key up in memory, then in the backend.
+
+        Arguments:
+            key {str} -- cache key
+
+        Returns:
+            object -- cached value, or None on a miss
+        """
+        start = time.perf_counter()
+        (value, level) = self._lookup(key)
+        instrumentation.cache_seconds.observe(time.perf_counter() - start, cache=self.name)
+        instrumentation.cache_requests.inc(cache=self.name, result=level)
+        return value
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0], "memory"
+        if self.backend is None:
+            return None, "miss"
+        value = self.backend.get(key)
+        if value is None:
+            return None, "miss"
+        self._store(key, value)
+        return value, "backend"
+
+    def set(self, key, value):
+        """Stores a value in memory and in the backend.
+
+        Arguments:
+            key {str} -- cache key
+            value {object} -- value to cache
+        """
+        self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    def _store(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            log.debug("Not caching {} in memory: {} bytes".format(key, size))
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                (_, (_, evicted)) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        """Empties the in-process level."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def current_version(self):
+        """Returns the data version, clearing the in-process level when it has
+        changed.
+
+        Returns:
+            str -- current data version, "" without a version callable
+        """
+        if self.version is None:
+            return ""
+        version = self.version()
+        if version != self._version:
+            if self._version is not None:
+                log.info("Data version changed to {}, clearing cache".format(version))
+                self.clear()
+            self._version = version
+            if self.on_change is not None:
+                self.on_change(version)
+        return version
+
+    def memoize(self, cache_empty=False):
+        """Decorator caching a function's result by data version, name and arguments.
+        None is never cached.
+
+        Keyword Arguments:
+            cache_empty {bool} -- also cache empty results; off by default, as the
+                                  queries return empty results when they fail
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args):
+                key = "{}:{}{}".format(self.current_version(), func.__name__, args)
+                value = self.get(key)
+                if value is None:
+                    value = func(*args)
+                    if value is not None and (cache_empty or not self.is_empty(value)):
+                        self.set(key, value)
+                return value
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,94 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module aligning and normalising the series of several countries for comparison.
+    Series are handled as dates x countries matrices, never per country.
+"""
+import numpy as np
+import pandas as pd
+
+
+def to_matrices(data, metric):
+    """Pivots a country_query_many() frame into cumulative and daily matrices.
+
+    Arguments:
+        data {dataframe} -- country series indexed by (country, date)
+        metric {str} -- cumulative series to compare, e.g. confirmed_cases
+
+    Returns:
+        tuple -- cumulative and daily dates x countries dataframes
+    """
+    cumulative = data[metric].unstack(level=0)
+    daily_column = "new_{}".format(metric)
+    if daily_column in data:
+        daily = data[daily_column].unstack(level=0)
+    else:
+        daily = cumulative.fillna(0).diff()
+    return cumulative.astype(float), daily.astype(float)
+
+
+def days_since(cumulative, threshold):
+    """Realigns matrices so that row n is n days after each country's Nth case.
+
+    Arguments:
+        cumulative {dataframe} -- dates x countries cumulative counts
+        threshold {int} -- count that marks day zero
+
+    Returns:
+        function -- applies the alignment to any matrix shaped like cumulative
+    """
+    values = np.nan_to_num(cumulative.to_numpy(dtype=float))
+    reached = values >= threshold
+    started = reached.any(axis=0)
+    first = reached.argmax(axis=0)
+    days = values.shape[0] - first[started].min() if started.any() else 0
+    rows = np.arange(days)[:, None] + first[None, :]
+    valid = (rows < values.shape[0]) & started[None, :]
+    rows = np.minimum(rows, values.shape[0] - 1)
+
+    def align(matrix):
+        aligned = np.take_along_axis(matrix.to_numpy(dtype=float), rows, axis=0)
+        aligned[~valid] = np.nan
+        index = pd.RangeIndex(days, name="days")
+        return pd.DataFrame(aligned, index=index, columns=matrix.columns)
+
+    return align
+
+
+def share_of_peak(matrix):
+    """Scales every column to a percentage of its own maximum.
+
+    Arguments:
+        matrix {dataframe} -- dates x countries values
+
+    Returns:
+        dataframe -- scaled values
+    """
+    peak = matrix.abs().max(axis=0).replace(0, np.nan)
+    return matrix.div(peak, axis=1) * 100
+
+
+def compare(data, metric, threshold=None, normalise=False):
+    """Builds the aligned cumulative and daily matrices of the comparison view.
+
+    Arguments:
+        data {dataframe} -- country series indexed by (country, date)
+        metric {str} -- cumulative series to compare
+
+    Keyword Arguments:
+        threshold {int} -- align on days since this many cases; by date if None
+        normalise {bool} -- scale each country to a percentage of its peak
+
+    Returns:
+        tuple -- cumulative and daily dataframes, one column per country
+    """
+    (cumulative, daily) = to_matrices(data, metric)
+    if threshold is not None:
+        align = days_since(cumulative, threshold)
+        (cumulative, daily) = (align(cumulative), align(daily))
+    if normalise:
+        (cumulative, daily) = (share_of_peak(cumulative), share_of_peak(daily))
+    return cumulative, daily
@@ -0,0 +1,191 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module handling the US county datasets.
+    The county files have one row per county and one column per date, too many
+    regions for the wide tables. They are read in chunks of rows, melted and
+    streamed into the long county_series table, so memory stays bounded by the
+    chunk size. A small county_summary table holds the latest values for top-N
+    queries.
+
+    python -m utils.counties [--url URL_OR_PATH_TEMPLATE]
+"""
+import time
+import argparse
+import logging as log
+
+import pandas as pd
+from utils import instrumentation
+from utils.db_interface import PostgresDB
+
+URL = "https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{}_US.csv"
+METRICS = {"confirmed": "confirmed_cases", "deaths": "deaths"}
+INFO_COLUMNS = {
+    "UID": "uid",
+    "FIPS": "fips",
+    "Admin2": "county",
+    "Province_State": "state",
+    "Population": "population",
+}
+
+
+class CountyDB(PostgresDB):
+    chunk_rows = 500
+
+    def create_tables(self, url=URL):
+        """Creates the county tables and reloads them from the county datasets, in
+        one transaction so readers never see a partial load.
+
+        Arguments:
+            url {str} -- source of raw data, a URL or local path formatted with
+                         "confirmed" or "deaths"
+
+        Returns:
+            dict -- rows written per metric and to county_summary
+        """
+        self.run_script("sql/counties/create_tables.txt")
+        start = time.perf_counter()
+        rows = {}
+        summaries = {}
+        with self.engine.begin() as conn:
+            conn.execute("TRUNCATE county_series")
+            for name, metric in METRICS.items():
+                log.info("Reading county dataset: {}".format(name))
+                chunks = []
+                rows[metric] = 0
+                for chunk in pd.read_csv(url.format(name), chunksize=self.chunk_rows):
+                    (long_df, summary) = self.format_chunk(chunk, metric)
+                    self.write_frame(conn, long_df, "county_series")
+                    rows[metric] += len(long_df)
+                    chunks.append(summary)
+                summaries[metric] = pd.concat(chunks)
+            summary = self.join_summaries(summaries)
+            conn.execute("DELETE FROM county_summary")
+            self.write_frame(conn, summary, "county_summary")
+            rows["county_summary"] = len(summary)
+        log.info(
+            "County ingest complete in {:.2f}s, rows written: {}".format(
+                time.perf_counter() - start, rows
+            )
+        )
+        return rows
+
+    @staticmethod
+    def format_chunk(chunk, metric):
+        """Melts a chunk of a county dataset into county_series rows and summarises
+        its latest two dates.
+
+        Arguments:
+            chunk {dataframe} -- rows of a raw county dataset
+            metric {str} -- metric name, stored in the metric column
+
+        Returns:
+            tuple -- long-format rows, and the chunk's county details and latest and
+                     reference values indexed by uid
+        """
+        dates = [column for column in chunk.columns if column[0].isnumeric()]
+        info = chunk[[column for column in INFO_COLUMNS if column in chunk]]
+        info = info.rename(columns=INFO_COLUMNS).set_index("uid")
+        info["fips"] = [
+            None if pd.isna(fips) else "{:05d}".format(int(fips)) for fips in info["fips"]
+        ]
+        values = chunk[dates].fillna(0).astype("int64")
+        values.index = info.index
+        values.columns = pd.to_datetime(dates, format="%m/%d/%y")
+        long_df = values.stack().rename("value").reset_index()
+        long_df.columns = ["uid", "date", "value"]
+        long_df.insert(1, "metric", metric)
+        info[metric] = values.iloc[:, -1]
+        info["ref_{}".format(metric)] = values.iloc[:, -2]
+        return long_df, info
+
+    @staticmethod
+    def join_summaries(summaries):
+        """Joins the per-metric summaries into county_summary rows. Only the deaths
+        dataset carries populations, so details are taken from whichever has them.
+
+        Arguments:
+            summaries {dict} -- summaries from format_chunk(), keyed by metric
+
+        Returns:
+            dataframe -- one row per county
+        """
+        frames = list(summaries.values())
+        summary = frames[0]
+        for frame in frames[1:]:
+            summary = summary.combine_first(frame)
+        summary = summary.reset_index()
+        # combine_first leaves every numeric column float64, which COPY cannot load
+        # into the BIGINT columns.
+        for column in summary.columns:
+            if column != "uid" and pd.api.types.is_numeric_dtype(summary[column]):
+                summary[column] = summary[column].round().astype("Int64")
+        return summary
+
+    @instrumentation.query_seconds.time("method")
+    def county_top(self, n=20, metric="confirmed_cases"):
+        """Queries the n counties with the highest latest value of a metric.
+
+        Keyword Arguments:
+            n {int} -- number of counties
+            metric {str} -- "confirmed_cases" or "deaths"
+
+        Returns:
+            dataframe -- county details with latest and reference values
+        """
+        if metric not in METRICS.values():
+            raise ValueError("Unknown county metric {}".format(metric))
+        try:
+            return self.execute_prepared("counties/top_{}_query".format(metric), n)
+        except Exception:
+            log.error("County top query failed")
+            return pd.DataFrame()
+
+    @instrumentation.query_seconds.time("method")
+    def county_query(self, uid):
+        """Queries the time series of one county.
+
+        Arguments:
+            uid {int} -- JHU county UID
+
+        Returns:
+            dataframe -- cumulative and daily series, indexed by date
+        """
+        try:
+            results = self.execute_prepared("counties/county_query", int(uid))
+        except Exception:
+            log.error("County data unavailable")
+            return pd.DataFrame()
+        results["date"] = pd.to_datetime(results["date"])
+        series = results.pivot(index="date", columns="metric", values="value")
+        series.columns.name = None
+        for metric in METRICS.values():
+            if metric in series:
+                series["new_{}".format(metric)] = series[metric].diff()
+        return series
+
+    @instrumentation.query_seconds.time("method")
+    def county_list(self, state):
+        """Queries the counties of a state.
+
+        Arguments:
+            state {str} -- state name, e.g. New York
+
+        Returns:
+            dataframe -- uid, fips and name of each county, ordered by name
+        """
+        try:
+            return self.execute_prepared("counties/county_list_query", state)
+        except Exception:
+            log.error("County list unavailable")
+            return pd.DataFrame()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest the JHU US county datasets.")
+    parser.add_argument("--url", default=URL, help="URL or local path template")
+    args = parser.parse_args()
+    CountyDB().create_tables(url=args.url)
@@ -9,70 +9,452 @@ Module handles all Postgres DB tasks.
 Returns:
     [type] -- [description]
 """
+import io
 import os
+import time
+import argparse
 import logging as log
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
 
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from utils import backends, derived, instrumentation, snapshot
+from utils.backends import Backend
+
+
+@lru_cache(maxsize=None)
+def read_template(path):
+    """Reads a SQL file once per process.
+
+    Arguments:
+        path {str} -- path of the SQL file
+
+    Returns:
+        str -- file contents
+    """
+    with open(path, "r") as file:
+        return file.read()
+
+
+def quote(identifier):
+    """Quotes a Postgres identifier, e.g. a mixed case table or a country column."""
+    return '"{}"'.format(identifier.replace('"', '""'))
+
+
+COUNTRY_RENAMES = {
+    "congo_(brazzaville)": "congo",
+    "congo_(kinshasa)": "congo",
+    "korea,_south": "south_korea",
+}
 
 
 class PostgresDB:
-    def __init__(self, dsets=["confirmed_cases", "recovered_cases", "deaths"]):
+    copy_chunk_rows = 50000
+
+    def __init__(self, dsets=["confirmed_cases", "recovered_cases", "deaths"], loader=None):
+        """Handles the creation of the Postgres tables.
+
+        Keyword Arguments:
+            dsets {list} -- datasets to ingest
+            loader {str} -- "copy" (COPY FROM STDIN) or "to_sql" (INSERTs); defaults
+                            to the DB_LOADER environment variable, then "copy"
+        """
         self.DATABASE_URL = os.environ["DATABASE_URL"]
-        self.engine = create_engine(self.DATABASE_URL)
+        self.engine = create_engine(
+            self.DATABASE_URL,
+            pool_size=int(os.environ.get("DB_POOL_SIZE", 5)),
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+            pool_recycle=int(os.environ.get("DB_POOL_RECYCLE", 1800)),
+            pool_pre_ping=True,
+        )
+        self.guard_pool(self.engine)
         self.dsets = dsets
+        self.revision_days = int(os.environ.get("INGEST_REVISION_DAYS", 7))
+        self.loader = loader or os.environ.get("DB_LOADER", "copy")
+        self.snapshot_dir = os.environ.get("SNAPSHOT_DIR", "snapshot-directory")
+        self.export_dir = os.environ.get("FILE_BACKEND_DIR", "")
+
+    @staticmethod
+    def guard_pool(engine):
+        """Stops pooled connections from being used outside the process that opened
+        them. A connection inherited across a fork is detached from the pool, without
+        closing the socket the parent still uses, and replaced by a new one.
+
+        Arguments:
+            engine {sqlalchemy.engine.Engine} -- engine whose pool to guard
+        """
+
+        @event.listens_for(engine, "connect")
+        def connect(dbapi_connection, connection_record):
+            connection_record.info["pid"] = os.getpid()
+
+        @event.listens_for(engine, "checkout")
+        def checkout(dbapi_connection, connection_record, connection_proxy):
+            pid = os.getpid()
+            if connection_record.info["pid"] != pid:
+                connection_record.connection = connection_proxy.connection = None
+                raise exc.DisconnectionError(
+                    "Connection record belongs to pid {}, attempting to check out "
+                    "in pid {}".format(connection_record.info["pid"], pid)
+                )
 
     def create_tables(
         self,
         url="https://raw.githubusercontent.com/CSSEGISandData/COVID-19/master/csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_{}_global.csv",
+        full=False,
+        workers=None,
     ):
         """Creates the tables within the Postgres DB.
            Heroku is scheduled to call this function at 3am every day.
 
+           Only the derived tables the dashboard reads are written. Unless full is
+           set, only dates newer than the stored data, plus the last revision_days
+           already stored, are rewritten.
+
+           With more than one worker the datasets are ingested concurrently: downloads
+           run in threads and formatting runs in a process pool. Per-stage timings are
+           logged and kept in self.timings.
+
         Keyword Arguments:
             url {str} -- source of raw data
+            full {bool} -- rebuild every table from scratch
+            workers {int} -- concurrent datasets; defaults to the INGEST_WORKERS
+                             environment variable, then 1
+
+        Returns:
+            dict -- rows written per derived table
+        """
+        workers = workers or int(os.environ.get("INGEST_WORKERS", 1))
+        self.timings = {dset: {} for dset in self.dsets}
+        self.run_script("sql/create_metadata_table.txt")
+        self.run_script("sql/create_derived_tables.txt")
+        start = time.perf_counter()
+        if workers > 1:
+            with ThreadPoolExecutor(workers) as threads, ProcessPoolExecutor(workers) as processes:
+                futures = [
+                    threads.submit(self.ingest_dataset, url, dset, processes)
+                    for dset in self.dsets
+                ]
+                results = [future.result() for future in futures]
+        else:
+            results = [self.ingest_dataset(url, dset) for dset in self.dsets]
+        transposed = {dset: result[0] for dset, result in zip(self.dsets, results)}
+        provinces = {dset: result[1] for dset, result in zip(self.dsets, results)}
+        rows = self.write_derived(transposed, provinces, full)
+        log.info(
+            "Ingest complete in {:.2f}s, rows written: {}, stage timings: {}".format(
+                time.perf_counter() - start, rows, self.timings
+            )
+        )
+        return rows
+
+    def ingest_dataset(self, url, dset, processes=None):
+        """Downloads and formats one dataset, timing each stage.
+
+        Arguments:
+            url {str} -- source of raw data
+            dset {str} -- dataset name
+
+        Keyword Arguments:
+            processes {ProcessPoolExecutor} -- pool to format in, if any
+
+        Returns:
+            tuple -- transposed dataframe from format_df() and province frame from
+                     to_provinces()
+        """
+        timings = self.timings[dset]
+        start = time.perf_counter()
+        log.info("Reading Dataset: {}".format(dset))
+        df = pd.read_csv(url.format(dset.split("_")[0]))
+        timings["download"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        log.info("Dataset Read, Formatting {}...".format(dset))
+        if processes is None:
+            (transposed_df, provinces) = self.prepare(df)
+        else:
+            (transposed_df, provinces) = processes.submit(self.prepare, df).result()
+        timings["format"] = time.perf_counter() - start
+        return transposed_df, provinces
+
+    def write_derived(self, transposed, provinces, full=False):
+        """Materialises the derived tables and publishes a new data version, all in
+        one transaction so readers never see a partial refresh. Country rows gain
+        per-100k columns from the bundled population table. The tables are rewritten
+        in full when they were written by an older derived.SCHEMA_VERSION.
+
+        Arguments:
+            transposed {dict} -- transposed dataframes from format_df(), keyed by dataset
+            provinces {dict} -- province frames from to_provinces(), keyed by dataset
+
+        Keyword Arguments:
+            full {bool} -- rewrite every row of the derived tables
+
+        Returns:
+            dict -- rows written per derived table
+        """
+        timings = self.timings["derived"] = {}
+        start = time.perf_counter()
+        series = derived.country_series(transposed)
+        (series, summary) = derived.add_per_capita(
+            series, derived.country_summary(series), derived.read_population()
+        )
+        province = derived.province_series(provinces)
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        metadata = derived.ingest_metadata(series, summary, version)
+        timings["derive"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = {}
+        with self.engine.begin() as conn:
+            schema = conn.execute(
+                "SELECT value FROM ingest_metadata WHERE key = 'derived_schema'"
+            ).scalar()
+            if schema != str(derived.SCHEMA_VERSION):
+                log.info("Derived tables are schema {}, rewriting in full.".format(schema))
+                full = True
+            rows["country_series"] = self.write_incremental(
+                conn, "country_series", series, ["country"], full=full
+            )
+            rows["province_series"] = self.write_incremental(
+                conn, "province_series", province, ["country", "province"], full=full
+            )
+            conn.execute("DELETE FROM country_summary")
+            self.write_frame(conn, summary, "country_summary")
+            rows["country_summary"] = len(summary)
+            self.write_metadata(conn, metadata)
+        timings["write"] = time.perf_counter() - start
+        if self.snapshot_dir:
+            start = time.perf_counter()
+            snapshot.write(self.snapshot_dir, version, series)
+            timings["snapshot"] = time.perf_counter() - start
+        if self.export_dir:
+            start = time.perf_counter()
+            backends.export(self.export_dir, version, series, summary, metadata, province)
+            timings["export"] = time.perf_counter() - start
+        return rows
+
+    @staticmethod
+    def prepare(df):
+        """Formats a raw dataset into the frames the derived tables are computed
+        from. Static so that it can run in a process pool.
+
+        Arguments:
+            df {dataframe} -- raw JHU dataset
+
+        Returns:
+            tuple -- transposed dataframe from format_df() and province frame from
+                     to_provinces()
+        """
+        (df, transposed_df) = PostgresDB.format_df(df)
+        return transposed_df, PostgresDB.to_provinces(df)
+
+    def run_script(self, path):
+        """Runs a SQL script, e.g. the CREATE TABLE IF NOT EXISTS statements.
+
+        Arguments:
+            path {str} -- path of the script
+        """
+        with self.engine.begin() as conn:
+            conn.execute(read_template(path))
+
+    def execute_prepared(self, name, *params):
+        """Runs a query from sql/ as a server-side prepared statement.
+
+        Each pooled connection prepares a template the first time it runs it, then
+        reuses the plan. Templates take positional parameters ($1, $2, ...), which
+        are bound by the driver rather than formatted into the SQL.
+
+        Arguments:
+            name {str} -- template path within sql/, without extension; with slashes
+                          replaced by underscores it is also the statement name
+            *params -- values bound to $1, $2, ...
+
+        Returns:
+            dataframe -- query result
+        """
+        with self.engine.connect() as conn:
+            prepared = conn.info.setdefault("prepared", set())
+            statement = name.replace("/", "_")
+            if statement not in prepared:
+                sql = read_template("sql/{}.txt".format(name))
+                conn.connection.cursor().execute("PREPARE {} AS {}".format(statement, sql))
+                prepared.add(statement)
+            sql = "EXECUTE {}".format(statement)
+            if params:
+                sql += "({})".format(", ".join("%(p{})s".format(n) for n in range(len(params))))
+            return pd.read_sql_query(
+                sql, conn, params={"p{}".format(n): value for n, value in enumerate(params)}
+            )
+
+    @staticmethod
+    def write_metadata(conn, values):
+        """Upserts key/value pairs into the ingest_metadata table.
+
+        Arguments:
+            conn {Connection} -- open connection; the caller owns the transaction
+            values {dict} -- values to store, keyed by metadata key
+        """
+        for key, value in values.items():
+            conn.execute(
+                "INSERT INTO ingest_metadata (key, value) VALUES (%(key)s, %(value)s) "
+                "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+                {"key": key, "value": str(value)},
+            )
+
+    def write_incremental(self, conn, table, frame, keys, full=False):
+        """Replaces the recent window of a date-keyed table with rows from frame.
+
+        Rows dated after (newest stored date - revision_days) are deleted and
+        rewritten. The table is rewritten in full when it is empty, when full is set,
+        or when frame holds keys (e.g. a new country) that the newest stored date
+        lacks, since their older history would otherwise be missing.
+
+        Arguments:
+            conn {Connection} -- open connection; the caller owns the transaction
+            table {str} -- table name
+            frame {dataframe} -- complete source rows, including a date column
+            keys {list} -- columns identifying one series within the table
+
+        Keyword Arguments:
+            full {bool} -- rewrite every row
+
+        Returns:
+            int -- number of rows written
+        """
+        latest = None
+        if not full:
+            latest = conn.execute("SELECT MAX(date) FROM {}".format(table)).scalar()
+        if latest is not None:
+            stored = pd.read_sql_query(
+                "SELECT {} FROM {} WHERE date = %(latest)s".format(", ".join(keys), table),
+                conn,
+                params={"latest": latest},
+            )
+            new_keys = set(map(tuple, frame[keys].values)) - set(map(tuple, stored.values))
+            if new_keys:
+                log.info("{} new series in {}, rewriting in full.".format(len(new_keys), table))
+                latest = None
+        if latest is None:
+            deleted = conn.execute("DELETE FROM {}".format(table))
+        else:
+            since = pd.Timestamp(latest) - pd.Timedelta(days=self.revision_days)
+            deleted = conn.execute(
+                "DELETE FROM {} WHERE date > %(since)s".format(table), {"since": since.date()}
+            )
+            frame = frame[frame["date"] > since]
+        self.write_frame(conn, frame, table)
+        log.info(
+            "{}: {} rows deleted, {} rows written.".format(table, deleted.rowcount, len(frame))
+        )
+        return len(frame)
+
+    def write_frame(self, conn, frame, table, replace=False, index=False):
+        """Writes a dataframe to a table with the configured loader.
+
+        The copy loader streams the frame through COPY FROM STDIN in chunks of
+        copy_chunk_rows, each rendered as CSV into an in-memory buffer. Missing values
+        are written as \\N, so empty strings stay empty rather than becoming NULL. With
+        replace the table is first recreated from the frame's dtypes, as to_sql would.
+
+        Arguments:
+            conn {Connection} -- open connection; the caller owns the transaction
+            frame {dataframe} -- rows to write
+            table {str} -- table name
+
+        Keyword Arguments:
+            replace {bool} -- drop and recreate the table first
+            index {bool} -- write the frame index as a column
+
+        Returns:
+            float -- seconds taken
+        """
+        start = time.perf_counter()
+        if self.loader != "copy":
+            frame.to_sql(table, conn, if_exists="replace" if replace else "append", index=index)
+        else:
+            if index:
+                frame = frame.reset_index()
+            if replace:
+                frame.head(0).to_sql(table, conn, if_exists="replace", index=False)
+            sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')".format(
+                quote(table), ", ".join(quote(column) for column in frame.columns)
+            )
+            cursor = conn.connection.cursor()
+            for offset in range(0, len(frame), self.copy_chunk_rows):
+                buffer = io.StringIO()
+                frame.iloc[offset : offset + self.copy_chunk_rows].to_csv(
+                    buffer, header=False, index=False, na_rep="\\N", date_format="%Y-%m-%d"
+                )
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+        elapsed = time.perf_counter() - start
+        log.info("{}: {} rows via {} in {:.2f}s".format(table, len(frame), self.loader, elapsed))
+        return elapsed
+
+    @staticmethod
+    def to_provinces(df):
+        """Pivots the provinces of a formatted wide dataset into a dates x (country,
+        province) frame. Only countries reported by province are kept; their row
+        without a province, if any, is named "Mainland".
+
+        Arguments:
+            df {dataframe} -- dataframe returned by format_df()
+
+        Returns:
+            dataframe -- dates x (country, province) frame, indexed by datetime
         """
-        for dset in self.dsets:
-            log.info("Dataset: {}".format(dset))
-            git_dset = dset.split("_")[0]
-            log.info("Reading Dataset.")
-            df = pd.read_csv(url.format(git_dset))
-            log.info("Dataset Read, Formatting...")
-            (df, transposed_df) = self.format_df(df)
-            log.info("Writing {} Table".format(dset))
-            df.to_sql(dset, self.engine, if_exists="replace")
-            log.info("Writing {}_T Table".format(dset))
-            transposed_df.to_sql("{}_T".format(dset), self.engine, if_exists="replace")
-
-    def format_df(self, df):
+        provinces = df.drop(["lat", "long"], axis=1)
+        provinces["country_region"] = [
+            PostgresDB.clean_name(name) for name in provinces["country_region"]
+        ]
+        reported = provinces.groupby("country_region")["province_state"].count()
+        reported = reported[reported > 0].index
+        provinces = provinces[provinces["country_region"].isin(reported)].copy()
+        provinces["province_state"] = (
+            provinces["province_state"].fillna("Mainland").str.strip()
+        )
+        provinces = provinces.groupby(["country_region", "province_state"]).sum().T
+        provinces.columns.names = ["country", "province"]
+        provinces.index = pd.to_datetime(provinces.index, format="_%m_%d_%y")
+        return provinces
+
+    @staticmethod
+    def format_df(df):
         df.columns = df.columns.str.replace("/", "_")
         df.columns = df.columns.str.lower()
         df.columns = [("_" + col) if col[0].isnumeric() else col for col in df.columns]
         transposed_df = df.copy()
         transposed_df.drop(["province_state", "lat", "long"], axis=1, inplace=True)
         transposed_df = transposed_df.groupby(["country_region"]).sum().T
-        transposed_df = self.clean_data(transposed_df)
+        transposed_df = PostgresDB.clean_data(transposed_df)
         return df, transposed_df
 
     @staticmethod
-    def clean_data(df):
-        df.columns = [
+    def clean_name(name):
+        """Normalises a JHU country name into the key used for columns and rows.
+
+        Arguments:
+            name {str} -- raw country_region value
+
+        Returns:
+            str -- lower case, underscored country key
+        """
+        name = (
             name.strip()
             .replace(" ", "_")
             .replace("-", "_")
             .replace("'", "_")
             .replace("*", "")
             .lower()
-            for name in df.columns
-        ]
-        df.rename(
-            columns={
-                "congo_(brazzaville)": "congo",
-                "congo_(kinshasa)": "congo",
-                "korea,_south": "south_korea",
-            },
-            inplace=True,
         )
+        return COUNTRY_RENAMES.get(name, name)
+
+    @staticmethod
+    def clean_data(df):
+        df.columns = [PostgresDB.clean_name(name) for name in df.columns]
         df = df.groupby(df.columns, axis=1).sum()
         df.reset_index(inplace=True)
         df.rename(columns={"index": "date"}, inplace=True)
@@ -80,100 +462,156 @@ class PostgresDB:
         return df
 
 
-class PostgresQueries(PostgresDB):
+class PostgresQueries(PostgresDB, Backend):
     def __init__(self):
         PostgresDB.__init__(self)
-        self.last_columns = self.find_last_columns()
-        print(self.last_columns)
+        Backend.__init__(self)
+
+    def after_fork(self):
+        """Swaps the inherited connection pool for a fresh one, without closing the
+        parent's connections."""
+        self.engine.pool = self.engine.pool.recreate()
+        log.info("Recreated connection pool after fork in pid {}".format(os.getpid()))
 
-    def find_last_columns(self):
-        """Determines the last columns added to the tables.
+    @instrumentation.query_seconds.time("method")
+    def read_metadata(self):
+        """Reads the key/value pairs recorded by the last ingest.
 
         Returns:
-            Series -- two most recent dates.
+            dict -- metadata values keyed by name, empty if unavailable
         """
-        with open("sql/last_column_query.txt", "r") as file:
-            sql = file.read()
         try:
-            out = pd.read_sql_query(sql, self.engine)
-            out = out['column_name'].str.split(pat='_', expand=True).drop([0], axis=1)
-            out = out.loc[out[3] == out[3].max()]
-            out = out.loc[out[1] == out[1].max()]
-            out[2] = out[2].astype(int)
-            out = out.sort_values(by=[2], ascending=False)[0:2].astype(str).reset_index()
-            out['column_name'] = '_' + out[1] + '_' + out[2] + '_' + out[3]
-            return out["column_name"]
+            out = self.execute_prepared("metadata_query")
         except Exception:
-            log.error("Last column not found")
-            return ""
+            log.warning("Ingest metadata unavailable")
+            return {}
+        return dict(zip(out["key"], out["value"]))
 
-    def overview_query(self):
-        """Query to retrieve the data of the 20 worst affected countries.
+    @instrumentation.query_seconds.time("method")
+    def overview_query(self, per_capita=False):
+        """Query to retrieve the data of the 20 worst affected countries from the
+        country_summary table.
+
+        Keyword Arguments:
+            per_capita {bool} -- rank and report values per 100k people, among
+                                 countries of at least backends.MIN_POPULATION
 
         Returns:
             dataframe -- overview data
         """
-        with open("sql/overview_query.txt", "r") as file:
-            sql = file.read()
-        sql = sql.format(
-            "%%", date=self.last_columns.iloc[0], ref=self.last_columns.iloc[1]
-        )
         try:
-            overview = pd.read_sql_query(sql, self.engine)
-            return overview
+            if per_capita:
+                return self.execute_prepared(
+                    "overview_per_capita_query", backends.MIN_POPULATION
+                )
+            return self.execute_prepared("overview_query")
         except Exception:
             log.error("Overview Query Failed")
             return []
 
-    def global_total(self):
-        """Queries global totals from all tables.
+    @instrumentation.query_seconds.time("method")
+    def country_query(self, country):
+        """Queries all time series data for a specified country from the derived
+        country_series table.
+
+        Arguments:
+            country {string} -- country to query
 
         Returns:
-            dataframe -- dataframe of global totals
+            dataframe -- dataframe of country data, indexed by date
         """
-        with open("sql/global_total_query.txt", "r") as file:
-            sql = file.read()
-        sql = sql.format(date=self.last_columns.iloc[0], ref=self.last_columns.iloc[1])
-        log.debug("SQL: {}".format(sql))
         try:
-            result = pd.read_sql_query(sql, self.engine)
+            results = self.execute_prepared("country_query", country.lower())
         except Exception:
-            log.error("Global Total Data Unavailable")
+            log.error("Data unavailable")
+            return pd.DataFrame()
+        results["date"] = pd.to_datetime(results["date"])
+        results.set_index("date", inplace=True)
+        return results
+
+    @instrumentation.query_seconds.time("method")
+    def country_list(self):
+        """Queries the names of every country with data.
+
+        Returns:
+            list -- normalised country names, sorted
+        """
+        try:
+            return list(self.execute_prepared("country_list_query")["country"])
+        except Exception:
+            log.error("Country list unavailable")
             return []
-        log.debug("Global total result: {}".format(result))
-        result = result.pivot(index="id", columns="dset", values="totals")
-        log.debug("Global total result pivotted: {}".format(result))
-        active = pd.DataFrame()
-        active["active_cases"] = (
-            result["confirmed_cases"] - result["deaths"] - result["recovered_cases"]
-        )
-        result = pd.concat([result, active], axis=1)
-        log.debug("Global total final result: {}".format(result))
-        return result
 
-    def country_query(self, country):
-        """Queries all time series data for a specified country.
+    @instrumentation.query_seconds.time("method")
+    def country_query_many(self, countries, start=None, end=None):
+        """Queries the time series of several countries in one round-trip.
 
         Arguments:
-            country {string} -- country to query
+            countries {list} -- countries to query
+
+        Keyword Arguments:
+            start {date} -- first date to include, unbounded if None
+            end {date} -- last date to include, unbounded if None
+
+        Returns:
+            dataframe -- dataframe of country data, indexed by (country, date)
+        """
+        try:
+            results = self.execute_prepared(
+                "country_query_many", [country.lower() for country in countries], start, end
+            )
+        except Exception:
+            log.error("Data unavailable")
+            return pd.DataFrame()
+        results["date"] = pd.to_datetime(results["date"])
+        results.set_index(["country", "date"], inplace=True)
+        return results
+
+    @instrumentation.query_seconds.time("method")
+    def province_list(self, country):
+        """Queries the provinces of a country from the province_series table.
+
+        Arguments:
+            country {string} -- normalised country name
+
+        Returns:
+            list -- province names, sorted; empty for national-only countries, None if
+                    unavailable
+        """
+        try:
+            return list(self.execute_prepared("province_list_query", country.lower())["province"])
+        except Exception:
+            log.error("Province list unavailable")
+            return None
+
+    @instrumentation.query_seconds.time("method")
+    def province_query(self, country, province):
+        """Queries all time series data for one province from the province_series
+        table, in a single primary key range scan.
+
+        Arguments:
+            country {string} -- normalised country name
+            province {string} -- province name
 
         Returns:
-            dataframe -- dataframe of country data
+            dataframe -- dataframe of province data, indexed by date
         """
-        with open("sql/country_query.txt", "r") as file:
-            sql = file.read()
-        sql = sql.format(country=country.lower())
         try:
-            results = pd.read_sql_query(sql, self.engine)
+            results = self.execute_prepared("province_query", country.lower(), province)
         except Exception:
             log.error("Data unavailable")
             return pd.DataFrame()
-        results["date"] = pd.to_datetime(results["date"], format="_%m_%d_%y")
+        results["date"] = pd.to_datetime(results["date"])
         results.set_index("date", inplace=True)
-        results.drop_duplicates(inplace=True)
         return results
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest the JHU datasets into Postgres.")
+    parser.add_argument("--full", action="store_true", help="rebuild every table in full")
+    parser.add_argument("--workers", type=int, help="datasets to ingest concurrently")
+    parser.add_argument("--url", help="URL or local path template of the datasets")
+    args = parser.parse_args()
     DB = PostgresDB()
-    DB.create_tables()
+    kwargs = {"url": args.url} if args.url else {}
+    DB.create_tables(full=args.full, workers=args.workers, **kwargs)
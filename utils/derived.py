@@ -0,0 +1,234 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module computing the derived per-country series materialised at ingest time.
+    Every function works on whole dates x countries frames rather than per country.
+"""
+import json
+
+import pandas as pd
+
+DSETS = ["confirmed_cases", "recovered_cases", "deaths"]
+SERIES = DSETS + ["active_cases"]
+DAILY = ["new_{}".format(dset) for dset in DSETS]
+POPULATION_PATH = "config/population.json"
+PER_CAPITA = 100000
+# Bumped whenever the derived tables gain columns or their rows are derived
+# differently, so the next ingest rewrites them in full rather than leaving older
+# rows empty or inconsistent.
+SCHEMA_VERSION = 3
+
+
+def country_matrices(transposed):
+    """Aligns the transposed datasets into dates x countries frames.
+
+    Arguments:
+        transposed {dict} -- transposed dataframes from format_df(), keyed by dataset
+
+    Returns:
+        dict -- dates x countries dataframes keyed by dataset, sharing one index
+                and one set of columns
+    """
+    matrices = {}
+    for dset, df in transposed.items():
+        matrix = df.drop(columns="index").set_index("date")
+        matrix.index = pd.to_datetime(matrix.index, format="_%m_%d_%y")
+        matrices[dset] = matrix
+    dates = sorted(set().union(*[matrix.index for matrix in matrices.values()]))
+    countries = sorted(set().union(*[matrix.columns for matrix in matrices.values()]))
+    return {
+        dset: matrix.reindex(index=dates, columns=countries, fill_value=0)
+        for dset, matrix in matrices.items()
+    }
+
+
+def country_series(transposed):
+    """Computes the per-country series served by the country view.
+
+    Cumulative series are null before their first non-zero value, so the first-case
+    date of each series is where its values begin; a series that is still all zero
+    is null throughout. Daily series (new_*) are the day on day differences and are
+    null on the first date only.
+
+    Arguments:
+        transposed {dict} -- transposed dataframes from format_df(), keyed by dataset
+
+    Returns:
+        dataframe -- one row per country and date
+    """
+    return stack_series(country_matrices(transposed), ["country"])
+
+
+def province_series(provinces):
+    """Computes the per-province series served by the country view's drill-down,
+    like country_series(). A dataset without a province's rows (JHU reports some
+    countries' recoveries nationally) leaves its series, and active_cases, null.
+
+    Arguments:
+        provinces {dict} -- province frames from to_provinces(), keyed by dataset
+
+    Returns:
+        dataframe -- one row per country, province and date
+    """
+    dates = sorted(set().union(*[matrix.index for matrix in provinces.values()]))
+    keys = sorted(set().union(*[matrix.columns for matrix in provinces.values()]))
+    keys = pd.MultiIndex.from_tuples(keys, names=["country", "province"])
+    matrices = {
+        dset: matrix.reindex(index=dates, columns=keys) for dset, matrix in provinces.items()
+    }
+    return stack_series(matrices, ["country", "province"])
+
+
+def stack_series(matrices, keys):
+    """Derives the served series from aligned dates x region matrices and stacks
+    them into rows.
+
+    Whether a row is null depends only on the values up to its own date, so an
+    incremental ingest that rewrites recent dates stores the same rows as a full one.
+
+    Arguments:
+        matrices {dict} -- dates x region frames keyed by dataset, sharing one index
+                           and one set of columns
+        keys {list} -- names of the column levels identifying a region
+
+    Returns:
+        dataframe -- one row per region and date
+    """
+    matrices["active_cases"] = (
+        matrices["confirmed_cases"] - matrices["recovered_cases"] - matrices["deaths"]
+    )
+    columns = {}
+    for dset in SERIES:
+        matrix = matrices[dset]
+        started = matrix.ne(0).cummax()
+        columns[dset] = matrix.where(started)
+    for dset in DSETS:
+        columns["new_{}".format(dset)] = matrices[dset].diff()
+    levels = list(range(1, len(keys) + 1))
+    series = pd.concat(columns, axis=1).stack(level=levels, dropna=False)
+    series.index.names = ["date"] + keys
+    series = series.reset_index()[keys + ["date"] + list(columns)]
+    series[list(columns)] = series[list(columns)].astype("Int64")
+    return series.sort_values(keys + ["date"]).reset_index(drop=True)
+
+
+def country_summary(series):
+    """Summarises the latest and reference (previous day) totals of every country.
+
+    Arguments:
+        series {dataframe} -- rows returned by country_series()
+
+    Returns:
+        dataframe -- one row per country, including its first-case date
+    """
+    dates = series["date"].drop_duplicates().nlargest(2)
+    totals = series.set_index("country")
+    latest = totals.loc[totals["date"] == dates.iloc[0], SERIES].fillna(0)
+    ref = totals.loc[totals["date"] == dates.iloc[-1], SERIES].fillna(0)
+    summary = latest.join(ref.add_prefix("ref_"))
+    summary["first_case_date"] = (
+        series.dropna(subset=["confirmed_cases"]).groupby("country")["date"].min()
+    )
+    summary.index.name = "country"
+    columns = ["confirmed_cases", "active_cases", "recovered_cases", "deaths"]
+    columns += ["ref_{}".format(column) for column in columns] + ["first_case_date"]
+    return summary[columns].reset_index()
+
+
+def read_population(path=POPULATION_PATH):
+    """Reads the bundled population table.
+
+    Keyword Arguments:
+        path {str} -- JSON object of populations keyed by normalised country name
+
+    Returns:
+        Series -- populations indexed by normalised country name
+    """
+    with open(path, encoding="utf-8") as f:
+        values = json.load(f)
+    return pd.Series(
+        {country: value for country, value in values.items() if not country.startswith("_")},
+        name="population",
+    )
+
+
+def per_capita(frame, population, columns):
+    """Adds a {column}_per_100k column for each column, from the population of each
+    row's country. Countries missing from the population table get nulls.
+
+    Arguments:
+        frame {dataframe} -- rows with a country column
+        population {Series} -- populations from read_population()
+        columns {list} -- columns to normalise
+
+    Returns:
+        dataframe -- frame with the added columns
+    """
+    per = frame["country"].map(population) / PER_CAPITA
+    normalised = {
+        "{}_per_100k".format(column): frame[column].astype("float64") / per
+        for column in columns
+    }
+    return frame.assign(**normalised)
+
+
+def add_per_capita(series, summary, population):
+    """Adds the per-100k columns to the country series and summary, and the
+    population to the summary for the per-capita overview ranking.
+
+    Arguments:
+        series {dataframe} -- rows of country_series()
+        summary {dataframe} -- rows of country_summary()
+        population {Series} -- populations from read_population()
+
+    Returns:
+        tuple -- series and summary with the added columns
+    """
+    series = per_capita(series, population, SERIES + DAILY)
+    references = ["ref_{}".format(dset) for dset in SERIES]
+    summary = per_capita(summary, population, SERIES + references)
+    summary["population"] = summary["country"].map(population).astype("Int64")
+    return series, summary
+
+
+def global_totals(summary, dates):
+    """Sums the latest and reference totals of every country.
+
+    Arguments:
+        summary {dataframe} -- rows returned by country_summary()
+        dates {Series} -- latest and reference dates, most recent first
+
+    Returns:
+        dict -- totals per series, keyed by ISO date
+    """
+    totals = {}
+    for prefix, date in zip(["", "ref_"], dates):
+        totals["{:%Y-%m-%d}".format(date)] = {
+            dset: int(summary[prefix + dset].sum()) for dset in SERIES
+        }
+    return totals
+
+
+def ingest_metadata(series, summary, version):
+    """Builds the key/value pairs recorded by an ingest, which readers use to find
+    the latest dates, the global totals and the data version.
+
+    Arguments:
+        series {dataframe} -- rows returned by country_series()
+        summary {dataframe} -- rows returned by country_summary()
+        version {str} -- data version of this ingest
+
+    Returns:
+        dict -- metadata values keyed by name, all strings
+    """
+    dates = series["date"].drop_duplicates().nlargest(2)
+    return {
+        "latest_date": "{:%Y-%m-%d}".format(dates.iloc[0]),
+        "previous_date": "{:%Y-%m-%d}".format(dates.iloc[-1]),
+        "global_totals": json.dumps(global_totals(summary, dates)),
+        "data_version": version,
+        "derived_schema": str(SCHEMA_VERSION),
+    }
@@ -0,0 +1,67 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module reducing long time series to a target number of points before plotting.
+    Both methods return the positions of the points to keep, first and last included.
+"""
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling, which keeps the visual shape of
+    a line.
+
+    Arguments:
+        x {ndarray} -- numeric x values, ascending
+        y {ndarray} -- y values without NaN
+        threshold {int} -- number of points to keep
+
+    Returns:
+        ndarray -- positions of the kept points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(float)
+    y = y.astype(float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    edges = np.append(edges, n)
+    kept = np.empty(threshold, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        (start, end) = (edges[bucket], edges[bucket + 1])
+        (next_start, next_end) = (edges[bucket + 1], edges[bucket + 2])
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        kept[bucket + 1] = a
+    return kept
+
+
+def minmax(y, threshold):
+    """Min/max bucketing, which keeps the extremes of each bucket, e.g. the peaks of
+    noisy daily bars.
+
+    Arguments:
+        y {ndarray} -- y values without NaN
+        threshold {int} -- approximate number of points to keep
+
+    Returns:
+        ndarray -- positions of the kept points
+    """
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+    kept = [0, n - 1]
+    for bucket in np.array_split(np.arange(1, n - 1), threshold // 2 - 1):
+        values = y[bucket]
+        kept += [bucket[values.argmin()], bucket[values.argmax()]]
+    return np.unique(kept)
@@ -0,0 +1,106 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module computing epidemiological indicators from case counts.
+    Every function works on whole dates x regions frames, so one call covers every
+    country at once; a single region is simply a frame with one column.
+"""
+import numpy as np
+import pandas as pd
+
+INDICATORS = ["average", "growth_rate", "doubling_time", "reproduction_number"]
+
+
+def rolling_average(daily, window=7):
+    """Averages daily values over a trailing window.
+
+    Arguments:
+        daily {dataframe} -- dates x regions daily values
+
+    Keyword Arguments:
+        window {int} -- days averaged; null until a full window is available
+
+    Returns:
+        dataframe -- trailing averages
+    """
+    return daily.rolling(window, min_periods=window).mean()
+
+
+def growth_rate(cumulative, window=7):
+    """Day-over-day growth of cumulative values, as the geometric mean over a
+    trailing window so a single late report does not dominate.
+
+    Arguments:
+        cumulative {dataframe} -- dates x regions cumulative values
+
+    Keyword Arguments:
+        window {int} -- days the growth is averaged over
+
+    Returns:
+        dataframe -- daily growth in percent; null while the earlier value is zero
+    """
+    previous = cumulative.shift(window)
+    ratio = (cumulative / previous).where((previous > 0) & (cumulative >= previous))
+    return (ratio ** (1 / window) - 1) * 100
+
+
+def doubling_time(growth):
+    """Days for cumulative values to double at a given daily growth rate.
+
+    Arguments:
+        growth {dataframe} -- daily growth in percent, from growth_rate()
+
+    Returns:
+        dataframe -- doubling time in days; null where there is no growth
+    """
+    rate = np.log1p(growth / 100)
+    return (np.log(2) / rate.where(rate > 0)).replace(np.inf, np.nan)
+
+
+def reproduction_number(average, window=7, serial_interval=5):
+    """Estimates the reproduction number from the exponential growth rate r of the
+    averaged daily cases, as R = exp(r x serial interval).
+
+    Arguments:
+        average {dataframe} -- dates x regions averaged daily values
+
+    Keyword Arguments:
+        window {int} -- days r is measured over
+        serial_interval {float} -- mean days between successive infections
+
+    Returns:
+        dataframe -- R estimates; null while either average is not positive
+    """
+    previous = average.shift(window)
+    ratio = (average / previous).where((previous > 0) & (average > 0))
+    return ratio ** (serial_interval / window)
+
+
+def indicators(cumulative, daily, window=7, serial_interval=5):
+    """Computes every indicator for every region.
+
+    Arguments:
+        cumulative {dataframe} -- dates x regions cumulative values
+        daily {dataframe} -- dates x regions daily values, sharing both axes
+
+    Keyword Arguments:
+        window {int} -- trailing window in days
+        serial_interval {float} -- mean days between successive infections
+
+    Returns:
+        dataframe -- dates x (indicator, region) values
+    """
+    average = rolling_average(daily.astype(float), window)
+    growth = growth_rate(cumulative.astype(float), window)
+    return pd.concat(
+        {
+            "average": average,
+            "growth_rate": growth,
+            "doubling_time": doubling_time(growth),
+            "reproduction_number": reproduction_number(average, window, serial_interval),
+        },
+        axis=1,
+    )
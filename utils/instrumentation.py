@@ -0,0 +1,146 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module recording request timings and counts, exposed in the Prometheus text format.
+    Metrics live in the memory of each process, so with several gunicorn workers each
+    scrape of /metrics reports the worker that served it.
+"""
+import time
+from bisect import bisect_left
+from functools import wraps
+from threading import Lock
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+
+registry = []
+
+
+def escape(value):
+    """Escapes a label value for the text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels, extra=()):
+    """Renders a label set, e.g. {callback="page_load"}."""
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(key, escape(value)) for key, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        """Monotonic count per label set.
+
+        Arguments:
+            name {str} -- metric name
+            documentation {str} -- HELP text
+        """
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = Lock()
+        registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation)]
+        lines.append("# TYPE {} counter".format(self.name))
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append("{}{} {}".format(self.name, format_labels(key), value))
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        """Bucketed distribution of observations per label set.
+
+        Arguments:
+            name {str} -- metric name
+            documentation {str} -- HELP text
+
+        Keyword Arguments:
+            buckets {tuple} -- ascending upper bounds, +Inf is implied
+        """
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = Lock()
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            (counts, total) = self._values.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def time(self, label, value=None):
+        """Decorator observing the duration of every call, including failed ones.
+
+        Arguments:
+            label {str} -- label name, e.g. "callback"
+
+        Keyword Arguments:
+            value {str} -- label value; defaults to the function name
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **{label: value or func.__name__})
+
+            return wrapper
+
+        return decorator
+
+    def render(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation)]
+        lines.append("# TYPE {} histogram".format(self.name))
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(
+                        "{}_bucket{} {}".format(
+                            self.name, format_labels(key, [("le", bound)]), cumulative
+                        )
+                    )
+                lines.append("{}_sum{} {}".format(self.name, format_labels(key), total))
+                lines.append("{}_count{} {}".format(self.name, format_labels(key), cumulative))
+        return lines
+
+
+def render():
+    """Renders every registered metric in the Prometheus text format.
+
+    Returns:
+        str -- exposition text
+    """
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+callback_seconds = Histogram("dash_callback_seconds", "Server-side Dash callback latency.")
+query_seconds = Histogram("db_query_seconds", "PostgresQueries method latency.")
+cache_seconds = Histogram("cache_lookup_seconds", "TieredCache lookup latency.")
+cache_requests = Counter(
+    "cache_requests_total", "TieredCache lookups by level that answered (memory, backend, miss)."
+)
+response_bytes = Histogram(
+    "dash_response_bytes", "Uncompressed Dash callback response size.", SIZE_BUCKETS
+)
@@ -0,0 +1,103 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module resolving user input to the normalised country names used by the queries.
+    Names are normalised exactly as the ingest normalises them, then looked up in
+    a dict of every country and alias. Unknown names get prefix and fuzzy
+    suggestions instead of a query.
+"""
+import json
+import difflib
+import logging as log
+from bisect import bisect_left
+
+from utils.db_interface import PostgresDB
+
+ALIASES_PATH = "config/country_aliases.json"
+
+
+def read_aliases(path=ALIASES_PATH):
+    """Reads the alias table, mapping alternative names to normalised country names.
+
+    Keyword Arguments:
+        path {str} -- JSON alias table
+
+    Returns:
+        dict -- normalised country names keyed by alias
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        log.error("Country aliases unavailable")
+        return {}
+
+
+def normalise(name):
+    """Normalises user input the way the ingest normalises country names.
+
+    Arguments:
+        name {str} -- user input
+
+    Returns:
+        str -- lower case, underscored key
+    """
+    return PostgresDB.clean_name(" ".join(name.split()))
+
+
+class CountryResolver:
+    def __init__(self, countries, aliases=None):
+        """Index of the countries with data and their aliases.
+
+        Arguments:
+            countries {list} -- normalised country names, e.g. from country_list()
+
+        Keyword Arguments:
+            aliases {dict} -- normalised country names keyed by alias; aliases of
+                              countries without data are ignored
+        """
+        self.countries = sorted(countries)
+        self.index = {country: country for country in self.countries}
+        for alias, country in (aliases or {}).items():
+            if country in self.index:
+                self.index.setdefault(normalise(alias), country)
+        self.keys = sorted(self.index)
+
+    def resolve(self, name):
+        """Looks up a country by name or alias.
+
+        Arguments:
+            name {str} -- user input, e.g. "United Kingdom", "uk" or "Korea, South"
+
+        Returns:
+            str -- normalised country name, or None if unknown
+        """
+        return self.index.get(normalise(name or ""))
+
+    def suggest(self, name, limit=3):
+        """Suggests countries for an unknown name: those whose name or an alias
+        starts with it, then the closest spellings.
+
+        Arguments:
+            name {str} -- user input
+
+        Keyword Arguments:
+            limit {int} -- maximum number of suggestions
+
+        Returns:
+            list -- normalised country names, best first
+        """
+        key = normalise(name or "")
+        if not key:
+            return []
+        suggestions = []
+        for i in range(bisect_left(self.keys, key), len(self.keys)):
+            if not self.keys[i].startswith(key):
+                break
+            suggestions.append(self.index[self.keys[i]])
+        for close in difflib.get_close_matches(key, self.keys, n=limit, cutoff=0.6):
+            suggestions.append(self.index[close])
+        return list(dict.fromkeys(suggestions))[:limit]
@@ -0,0 +1,196 @@
+"""
+COVID19 Dashboard by Torran Green
+
+All data is sourced from the Johns Hopkins University open dataset on GitHub.
+This dashboard is for educational use.
+----------------------------------------------------------------------------------------
+Module handling the read-only snapshot of the per-country series.
+    A snapshot is a dense countries x dates x metrics float array saved with numpy,
+    plus a JSON index of its countries, dates and metrics. One is written per data
+    version into its own directory, which appears atomically, and every worker
+    memory-maps it, so the pages are shared through the OS page cache.
+"""
+import os
+import json
+import shutil
+import tempfile
+import logging as log
+
+import numpy as np
+import pandas as pd
+
+METRICS = [
+    "confirmed_cases",
+    "recovered_cases",
+    "deaths",
+    "active_cases",
+    "new_confirmed_cases",
+    "new_recovered_cases",
+    "new_deaths",
+]
+METRICS += ["{}_per_100k".format(metric) for metric in METRICS]
+KEEP_VERSIONS = 2
+
+
+def write(directory, version, series):
+    """Writes the snapshot of a data version, unless it already exists.
+
+    The files are written to a temporary directory which is then renamed into
+    place, so readers never open a partial snapshot. Concurrent writers of the same
+    version are harmless: the first rename wins and the others are discarded.
+
+    Arguments:
+        directory {str} -- directory holding one sub-directory per data version
+        version {str} -- data version of the series
+        series {dataframe} -- rows of country_series(), or of country_query_many()
+                              with its index reset; the METRICS it lacks are left
+                              out
+
+    Returns:
+        str -- path of the snapshot
+    """
+    path = os.path.join(directory, version)
+    if os.path.isdir(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+    countries = sorted(series["country"].unique())
+    dates = pd.DatetimeIndex(sorted(pd.to_datetime(series["date"].unique())))
+    frame = series.assign(date=pd.to_datetime(series["date"]))
+    metrics = [metric for metric in METRICS if metric in frame.columns]
+    frame = frame.set_index(["country", "date"])[metrics].astype("float64")
+    frame = frame.reindex(pd.MultiIndex.from_product([countries, dates]))
+    values = frame.to_numpy().reshape(len(countries), len(dates), len(metrics))
+
+    tmp = tempfile.mkdtemp(prefix=".{}-".format(version), dir=directory)
+    np.save(os.path.join(tmp, "values.npy"), values)
+    with open(os.path.join(tmp, "index.json"), "w") as f:
+        json.dump(
+            {
+                "countries": countries,
+                "dates": ["{:%Y-%m-%d}".format(date) for date in dates],
+                "metrics": metrics,
+            },
+            f,
+        )
+    try:
+        os.rename(tmp, path)
+        log.info("Wrote snapshot {} ({} bytes)".format(path, values.nbytes))
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    prune(directory)
+    return path
+
+
+def prune(directory, keep=KEEP_VERSIONS):
+    """Removes all but the newest snapshots. Workers still mapping a removed
+    snapshot keep reading it until they move to the new version.
+
+    Arguments:
+        directory {str} -- directory holding one sub-directory per data version
+
+    Keyword Arguments:
+        keep {int} -- number of versions to keep
+    """
+    versions = sorted(
+        name
+        for name in os.listdir(directory)
+        if not name.startswith(".") and os.path.isdir(os.path.join(directory, name))
+    )
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+class Snapshot:
+    def __init__(self, path):
+        """Memory-maps a snapshot written by write(). Nothing is read into memory
+        until it is sliced.
+
+        Arguments:
+            path {str} -- path returned by write()
+        """
+        with open(os.path.join(path, "index.json")) as f:
+            index = json.load(f)
+        self.path = path
+        self.values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+        self.countries = index["countries"]
+        self.dates = pd.DatetimeIndex(index["dates"], name="date")
+        self.metrics = index["metrics"]
+        self.positions = {country: i for i, country in enumerate(self.countries)}
+
+    @classmethod
+    def open(cls, directory, version):
+        """Opens the snapshot of a data version if it has been written.
+
+        Arguments:
+            directory {str} -- directory holding one sub-directory per data version
+            version {str} -- data version to open
+
+        Returns:
+            Snapshot -- the snapshot, or None if unavailable
+        """
+        path = os.path.join(directory, version)
+        if not version or not os.path.isdir(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            log.error("Snapshot {} unreadable".format(path))
+            return None
+
+    def country(self, country):
+        """Slices the series of one country without copying.
+
+        Arguments:
+            country {string} -- normalised country name
+
+        Returns:
+            dataframe -- read-only country series indexed by date, empty if unknown
+        """
+        i = self.positions.get(country.lower())
+        if i is None:
+            return pd.DataFrame()
+        return pd.DataFrame(
+            self.values[i], index=self.dates, columns=self.metrics, copy=False
+        )
+
+    def country_many(self, countries, start=None, end=None):
+        """Slices the series of several countries, like country_query_many().
+
+        Arguments:
+            countries {list} -- normalised country names
+
+        Keyword Arguments:
+            start {date} -- first date to include, unbounded if None
+            end {date} -- last date to include, unbounded if None
+
+        Returns:
+            dataframe -- country series indexed by (country, date), empty if none
+                         of the countries are known
+        """
+        names = [country.lower() for country in countries]
+        names = [name for name in names if name in self.positions]
+        if not names:
+            return pd.DataFrame()
+        (lo, hi) = (0, len(self.dates))
+        if start is not None:
+            lo = self.dates.searchsorted(pd.Timestamp(start))
+        if end is not None:
+            hi = self.dates.searchsorted(pd.Timestamp(end), side="right")
+        block = self.values[[self.positions[name] for name in names], lo:hi]
+        index = pd.MultiIndex.from_product(
+            [names, self.dates[lo:hi]], names=["country", "date"]
+        )
+        values = block.reshape(-1, len(self.metrics))
+        return pd.DataFrame(values, index=index, columns=self.metrics)
+
+    def matrix(self, metric):
+        """Slices one metric of every country without copying.
+
+        Arguments:
+            metric {str} -- one of METRICS
+
+        Returns:
+            dataframe -- read-only dates x countries values
+        """
+        values = self.values[:, :, self.metrics.index(metric)].T
+        return pd.DataFrame(values, index=self.dates, columns=self.countries, copy=False)